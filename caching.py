@@ -0,0 +1,514 @@
+"""
+Cache primitives for Song Year Guesser
+
+The app keeps several process-wide caches (album art, Spotify track lists,
+playlist ids, Deezer preview URLs) that are shared by every Streamlit script
+thread and by worker threads. This module provides a thread-safe cache type
+with TTLs and size bounds that accounts for the memory held by each entry,
+and a `MemoryBudget` that keeps
+the combined size of all registered caches under a configurable limit by
+evicting from whichever cache is furthest over its share. The on-disk caches
+build on `DiskStore`.
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory held by a value, following containers recursively"""
+    seen: set[int] = set()
+
+    def size_of(obj: Any) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            size += sum(size_of(k) + size_of(v) for k, v in obj.items())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            size += sum(size_of(item) for item in obj)
+        return size
+
+    return size_of(value)
+
+
+class _Entry:
+    """A cached value with its accounting metadata"""
+
+    __slots__ = ("value", "size", "expires_at", "last_used", "uses")
+
+    def __init__(self, value: Any, size: int, expires_at: float | None):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.last_used = time.monotonic()
+        self.uses = 1
+
+    def expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+
+class _Stripe:
+    """One lock-protected shard of a `BoundedCache`"""
+
+    __slots__ = ("lock", "entries", "nbytes", "hits", "misses")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def remove(self, key: Hashable) -> _Entry:
+        """Remove an entry; the caller must hold `lock`"""
+        entry = self.entries.pop(key)
+        self.nbytes -= entry.size
+        return entry
+
+
+_MISSING = object()
+_DEFAULT_TTL = object()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Call for {key!r} was interrupted"))
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class BoundedCache:
+    """Thread-safe, dict-like cache that tracks the byte size of its entries.
+
+    Keys are spread over `stripes` independently locked shards so that
+    Streamlit script threads and worker threads rarely contend. Entries expire
+    after `ttl` seconds (per-entry overrides via `set`), and are evicted by
+    `policy` ("lru" or "lfu") when the cache holds more than `max_entries` or
+    the owning `MemoryBudget` needs space. `get_or_compute` runs the compute
+    function once per key even when many threads miss at the same time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: str = "lru",
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        share: float = 1.0,
+        stripes: int = 16,
+        sizer: Callable[[Any], int] = estimate_size,
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.name = name
+        self.policy = policy
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.share = share
+        self.sizer = sizer
+        self.budget: MemoryBudget | None = None
+        self.evictions = 0
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        self._flight = SingleFlight()
+
+    def _stripe(self, key: Hashable) -> _Stripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(stripe.nbytes for stripe in self._stripes)
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        keys: list[Hashable] = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                keys.extend(stripe.entries)
+        return iter(keys)
+
+    def _lookup(self, key: Hashable, count: bool = True) -> Any:
+        """Return the live value for `key` or `_MISSING`, dropping it if expired"""
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            if entry is not None and entry.expired(time.monotonic()):
+                stripe.remove(key)
+                entry = None
+            if entry is None:
+                if count:
+                    stripe.misses += 1
+                return _MISSING
+            if count:
+                stripe.hits += 1
+            entry.last_used = time.monotonic()
+            entry.uses += 1
+            stripe.entries.move_to_end(key)
+            return entry.value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Any = _DEFAULT_TTL):
+        """Store a value, optionally with its own time-to-live in seconds"""
+        ttl = self.ttl if ttl is _DEFAULT_TTL else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        entry = _Entry(value, self.sizer(key) + self.sizer(value), expires_at)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if key in stripe.entries:
+                stripe.remove(key)
+            stripe.entries[key] = entry
+            stripe.nbytes += entry.size
+
+        if self.max_entries is not None:
+            while len(self) > self.max_entries:
+                if self.evict_one("max_entries") is None:
+                    break
+        if self.budget is not None:
+            self.budget.enforce()
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.remove(key)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if key not in stripe.entries:
+                return default
+            return stripe.remove(key).value
+
+    def clear(self):
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+                stripe.nbytes = 0
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], ttl: Any = _DEFAULT_TTL
+    ) -> Any:
+        """Return the cached value, computing and storing it once on a miss.
+
+        Concurrent callers that miss on the same key wait for the first
+        caller's result (or exception) instead of computing it again.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        def load():
+            # Another caller may have stored the value between our miss and now
+            value = self._lookup(key, count=False)
+            if value is _MISSING:
+                value = compute()
+                self.set(key, value, ttl)
+            return value
+
+        return self._flight.do(key, load)
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry and return how many were removed"""
+        now = time.monotonic()
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                for key in [k for k, e in stripe.entries.items() if e.expired(now)]:
+                    stripe.remove(key)
+                    removed += 1
+        return removed
+
+    def _victim_in(self, stripe: _Stripe) -> tuple[Hashable, _Entry] | None:
+        """Pick the policy's candidate within one stripe; caller holds the lock"""
+        if not stripe.entries:
+            return None
+        if self.policy == "lfu":
+            # Ties go to the least recently used entry (first in order)
+            key = min(stripe.entries, key=lambda k: stripe.entries[k].uses)
+        else:
+            key = next(iter(stripe.entries))
+        return key, stripe.entries[key]
+
+    def evict_one(self, reason: str = "budget") -> tuple[Hashable, int] | None:
+        """Evict a single entry chosen by the cache's policy across all stripes"""
+        for _ in range(3):
+            best = None
+            for stripe in self._stripes:
+                with stripe.lock:
+                    candidate = self._victim_in(stripe)
+                if candidate is None:
+                    continue
+                key, entry = candidate
+                rank = (entry.uses, entry.last_used) if self.policy == "lfu" else entry.last_used
+                if best is None or rank < best[0]:
+                    best = (rank, stripe, key, entry)
+            if best is None:
+                return None
+
+            _, stripe, key, entry = best
+            with stripe.lock:
+                # Another thread may have touched or replaced it since we looked
+                if stripe.entries.get(key) is not entry:
+                    continue
+                stripe.remove(key)
+            self.evictions += 1
+            if self.budget is not None:
+                self.budget.record_eviction(self.name, key, entry.size, reason)
+            return key, entry.size
+        return None
+
+    def stats(self) -> dict:
+        """Size and hit-rate counters for reporting"""
+        hits = sum(stripe.hits for stripe in self._stripes)
+        misses = sum(stripe.misses for stripe in self._stripes)
+        lookups = hits + misses
+        return {
+            "entries": len(self),
+            "bytes": self.nbytes,
+            "policy": self.policy,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "coalesced": self._flight.coalesced,
+        }
+
+
+class MemoryBudget:
+    """Enforce a total memory budget across several registered caches.
+
+    When the combined size exceeds `budget_bytes`, entries are evicted from the
+    cache whose size is furthest over its weighted share of the budget, using
+    that cache's own LRU or LFU policy. Evictions are summarised in one log
+    line at most every `log_interval` seconds, since a full cache evicts on
+    nearly every insert, and recent decisions are kept in `recent_evictions`.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        history: int = 200,
+        log: Callable[[str], None] = print,
+        log_interval: float = 60.0,
+    ):
+        self.budget_bytes = budget_bytes
+        self.caches: dict[str, BoundedCache] = {}
+        self.recent_evictions: deque[dict] = deque(maxlen=history)
+        self.log = log
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._unlogged: Counter[str] = Counter()
+        self._unlogged_bytes = 0
+        self._last_log = time.monotonic()
+
+    def register(self, cache: BoundedCache) -> BoundedCache:
+        cache.budget = self
+        self.caches[cache.name] = cache
+        return cache
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(cache.nbytes for cache in self.caches.values())
+
+    def record_eviction(self, cache_name: str, key: Hashable, size: int, reason: str):
+        self.recent_evictions.append(
+            {
+                "time": time.time(),
+                "cache": cache_name,
+                "key": str(key)[:120],
+                "bytes": size,
+                "reason": reason,
+            }
+        )
+
+    def _pick_victim(self) -> BoundedCache | None:
+        total_share = sum(cache.share for cache in self.caches.values()) or 1.0
+        candidates = [cache for cache in self.caches.values() if len(cache)]
+        if not candidates:
+            return None
+        return max(
+            candidates,
+            key=lambda c: c.nbytes - self.budget_bytes * c.share / total_share,
+        )
+
+    def enforce(self):
+        """Evict entries until the combined size fits the budget"""
+        if self.total_bytes <= self.budget_bytes:
+            return
+        # Only one thread needs to run an eviction pass at a time
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            evicted: Counter[str] = Counter()
+            freed = 0
+            # Expired entries are free to drop before anything live is evicted
+            for cache in self.caches.values():
+                expired = cache.purge_expired()
+                if expired:
+                    evicted[cache.name] += expired
+            while self.total_bytes > self.budget_bytes:
+                victim = self._pick_victim()
+                if victim is None:
+                    break
+                result = victim.evict_one("budget")
+                if result is None:
+                    break
+                evicted[victim.name] += 1
+                freed += result[1]
+
+            self._unlogged.update(evicted)
+            self._unlogged_bytes += freed
+            now = time.monotonic()
+            if not self._unlogged or now - self._last_log < self.log_interval:
+                return
+            detail = ", ".join(f"{count} from {name}" for name, count in self._unlogged.items())
+            message = (
+                f"WARNING: Cache budget: evicted {detail} ({self._unlogged_bytes / 1e6:.1f} MB) "
+                f"in the last {now - self._last_log:.0f}s; "
+                f"now {self.total_bytes / 1e6:.1f}/{self.budget_bytes / 1e6:.1f} MB"
+            )
+            self._unlogged.clear()
+            self._unlogged_bytes = 0
+            self._last_log = now
+        finally:
+            self._lock.release()
+
+        self.log(message)
+
+    def stats(self) -> dict:
+        """Per-cache sizes plus the overall budget usage"""
+        return {
+            "budget_bytes": self.budget_bytes,
+            "total_bytes": self.total_bytes,
+            "caches": {name: cache.stats() for name, cache in self.caches.items()},
+        }
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write then rename so readers in any process never see a partial file"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def prune_directory(directory: Path, max_bytes: int):
+    """Delete the least recently modified files until `directory` fits `max_bytes`"""
+    files = []
+    for path in directory.iterdir():
+        with contextlib.suppress(OSError):
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(OSError):
+            path.unlink()
+            total -= size
+
+
+class DiskStore:
+    """Size-capped directory of files that other processes and restarts can share.
+
+    Files are written with `atomic_write`, so concurrent writers in any process
+    are safe. Every `prune_every` writes the directory is pruned back to
+    `max_bytes`, least recently modified first; `read` refreshes a file's
+    mtime so files still in use are the last to go.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int, prune_every: int = 50):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def read(self, name: str) -> bytes | None:
+        """Contents of a stored file, or None if it does not exist"""
+        path = self.directory / name
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, name: str, data: bytes):
+        """Store a file, pruning the directory every `prune_every` writes"""
+        atomic_write(self.directory / name, data)
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_every == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently used files until the directory fits `max_bytes`"""
+        prune_directory(self.directory, self.max_bytes)
@@ -0,0 +1,491 @@
+"""
+Image processing for Song Year Guesser
+
+Album covers are progressively unblurred during a round. A Gaussian blur at
+radius 25 on a full 640px Spotify cover is the most CPU-expensive operation in
+the app, yet almost all detail is gone at that radius and the result is shown
+at 450px. `blur` therefore picks a working resolution from the radius, blurs
+at that reduced scale and resamples the result to the display size.
+
+Heavily blurred frames are also rendered from Spotify's smaller cover variants
+(`pick_variant`), so only the final reveal needs the full-size download, and
+frames are sent as compact lossy WebP/JPEG (`encode`) rather than PNG. When
+Streamlit static file serving is enabled, frames are written to a
+`StaticImageStore` and referenced by URL instead of inlined as data URIs.
+Rendered frames are also kept in a `FrameCache` on disk so other processes
+and restarts can reuse them.
+Blurring and encoding run in an `ImageWorkerPool` of separate processes so
+they do not hold up Streamlit script threads.
+
+Compare the engine against the full-resolution path with:
+
+    python images.py benchmark [cover.jpg]
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import multiprocessing
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageStat, features
+
+from caching import DiskStore
+
+# Smallest blur radius worth keeping at the working resolution; below this the
+# downscale itself would visibly change the result
+TARGET_WORKING_RADIUS = 2.0
+MIN_WORKING_SIZE = 32
+# Mean absolute per-channel difference (0-255) allowed versus the reference path
+MAX_VISUAL_DIFFERENCE = 2.0
+# A smaller cover variant may be used once the radius scaled to its size reaches
+# this many pixels; at that point the missing detail is blurred away anyway
+MIN_VARIANT_RADIUS = 1.5
+
+
+# Output encoders by config name: (Pillow format, MIME type)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+# Downloaded covers in these formats can be sent to the browser as they are
+PASSTHROUGH_FORMATS = ("JPEG", "WEBP", "PNG")
+MIN_QUALITY = 30
+
+
+def _as_blurrable(img: Image.Image) -> Image.Image:
+    """Convert palette or CMYK images to a mode GaussianBlur supports"""
+    if img.mode not in ("RGB", "RGBA", "L"):
+        return img.convert("RGBA" if "transparency" in img.info else "RGB")
+    return img
+
+
+def decode(data: bytes) -> Image.Image:
+    """Decode image bytes fully so the result can be shared between threads"""
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+def decoded_size(value: object) -> int:
+    """Memory held by a decoded image's pixel buffer, for cache accounting"""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    return sys.getsizeof(value)
+
+
+def reduction_factor(size: tuple[int, int], radius: float) -> int:
+    """Choose an integer downscale factor that keeps the scaled radius well resolved"""
+    factor = int(radius // TARGET_WORKING_RADIUS)
+    max_factor = min(size) // MIN_WORKING_SIZE
+    return max(1, min(factor, max_factor))
+
+
+def pick_variant(variants: list[dict], radius: float) -> tuple[str, float] | None:
+    """Pick the smallest cover variant that still resolves a blur radius.
+
+    `variants` are `{"url", "width"}` dicts for the same artwork at different
+    sizes and `radius` is in pixels of the largest one. Returns the chosen URL
+    and its scale relative to the largest variant, or None if no sizes are known.
+    """
+    sized = sorted(
+        (v for v in variants if v.get("url") and v.get("width")), key=lambda v: v["width"]
+    )
+    if not sized:
+        return None
+    full_width = sized[-1]["width"]
+    if radius > 0:
+        for variant in sized:
+            scale = variant["width"] / full_width
+            if radius * scale >= MIN_VARIANT_RADIUS:
+                return variant["url"], scale
+    return sized[-1]["url"], 1.0
+
+
+def blur(img: Image.Image, radius: float, display_size: int | None = None) -> Image.Image:
+    """Blur an image as if at full resolution, working at a reduced scale.
+
+    `radius` is in source pixels, matching `ImageFilter.GaussianBlur` on the
+    original image. Blurred results are resampled to `display_size` (longest
+    side) when given; an unblurred image is returned at its own resolution.
+    """
+    img = _as_blurrable(img)
+    if radius <= 0:
+        return img
+
+    width, height = img.size
+    # A (near) integer box reduction averages whole pixel blocks, so it adds
+    # almost no aliasing; resizing to the exact size keeps the geometry aligned
+    factor = reduction_factor(img.size, radius)
+    if factor > 1:
+        work_size = (max(1, round(width / factor)), max(1, round(height / factor)))
+        work = img.resize(work_size, Image.Resampling.BOX)
+    else:
+        work = img
+    work = work.filter(ImageFilter.GaussianBlur(radius=radius * work.width / width))
+
+    if display_size:
+        scale = display_size / max(width, height)
+        out_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    else:
+        out_size = (width, height)
+    if work.size != out_size:
+        work = work.resize(out_size, Image.Resampling.BICUBIC)
+    return work
+
+
+def quality_for_blur(blur_amount: float, max_blur: float, sharp: int, blurred: int) -> int:
+    """Interpolate encoder quality from `sharp` at no blur to `blurred` at `max_blur`.
+
+    Blurred frames have no fine detail for compression artifacts to damage, so
+    they can be encoded far more aggressively than the final reveal.
+    """
+    t = min(1.0, max(0.0, blur_amount / max_blur)) if max_blur > 0 else 0.0
+    return round(sharp + (blurred - sharp) * t)
+
+
+def keyframe_levels(max_blur: int, count: int) -> list[int]:
+    """Evenly spaced integer blur levels from `max_blur` down to 0"""
+    if count < 2:
+        return [max_blur, 0]
+    return sorted({round(max_blur * i / (count - 1)) for i in range(count)}, reverse=True)
+
+
+def keyframe_opacities(levels: list[int], blur_amount: float) -> list[float]:
+    """Opacity of each keyframe layer to approximate `blur_amount`.
+
+    Layers are stacked in `levels` order (most blurred at the bottom, always
+    opaque). Each sharper layer fades in as the blur passes from the level
+    below it to its own, so the visible result is a linear crossfade between
+    the two keyframes bracketing `blur_amount`.
+    """
+    opacities = [1.0]
+    for above, level in zip(levels, levels[1:], strict=False):
+        opacities.append(min(1.0, max(0.0, (above - blur_amount) / (above - level))))
+    return opacities
+
+
+def encode(
+    img: Image.Image, fmt: str = "webp", quality: int = 80, max_bytes: int | None = None
+) -> tuple[bytes, str]:
+    """Encode an image, lowering lossy quality until it fits `max_bytes`.
+
+    Returns the encoded bytes and their MIME type. WebP falls back to JPEG when
+    Pillow was built without WebP support.
+    """
+    fmt = fmt.lower()
+    if fmt not in OUTPUT_FORMATS or (fmt == "webp" and not features.check("webp")):
+        fmt = "jpeg"
+    pil_format, mime = OUTPUT_FORMATS[fmt]
+    if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    while True:
+        buffered = io.BytesIO()
+        if pil_format == "PNG":
+            img.save(buffered, format="PNG")
+        else:
+            img.save(buffered, format=pil_format, quality=quality)
+        data = buffered.getvalue()
+        if pil_format == "PNG" or max_bytes is None or len(data) <= max_bytes:
+            return data, mime
+        if quality <= MIN_QUALITY:
+            return data, mime
+        quality = max(MIN_QUALITY, quality - 10)
+
+
+def data_uri(data: bytes, mime: str) -> str:
+    """Build a base64 data URI for inlining an image in HTML"""
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+class StaticImageStore(DiskStore):
+    """Content-addressed directory of encoded images served as static files.
+
+    Files are named by the SHA-256 of their bytes, so a URL never changes what
+    it points to. URLs carry a `v` query argument, which makes Streamlit's
+    static file handler send a long-lived Cache-Control header.
+    """
+
+    EXTENSIONS = {"image/webp": ".webp", "image/jpeg": ".jpg", "image/png": ".png"}
+
+    def __init__(
+        self, directory: str | Path, url_prefix: str, max_bytes: int, prune_every: int = 50
+    ):
+        super().__init__(directory, max_bytes, prune_every)
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def put(self, data: bytes, mime: str) -> str:
+        """Store encoded image bytes and return their static URL"""
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{digest[:32]}{self.EXTENSIONS.get(mime, '.bin')}"
+        if not (self.directory / name).exists():
+            self.write(name, data)
+        return f"{self.url_prefix}/{name}?v={digest[:12]}"
+
+    def contains(self, url: str) -> bool:
+        """Check that a URL returned by `put` still has its file on disk"""
+        if not url.startswith(self.url_prefix + "/"):
+            return False
+        name = url[len(self.url_prefix) + 1 :].split("?", 1)[0]
+        return (self.directory / name).exists()
+
+
+class FrameCache(DiskStore):
+    """Disk cache of rendered frames shared by processes and restarts.
+
+    Entries are keyed by a hash of the source cover URL, the blur level and
+    the render settings, so any process pointed at the same directory can
+    reuse a frame another one rendered.
+    """
+
+    EXTENSIONS = StaticImageStore.EXTENSIONS
+
+    def __init__(self, directory: str | Path, max_bytes: int, prune_every: int = 50):
+        super().__init__(directory, max_bytes, prune_every)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(source_url: str, blur_amount: int, settings: str) -> str:
+        """Cache key for one blur level of a cover rendered with `settings`"""
+        return hashlib.sha256(f"{source_url}\0{blur_amount}\0{settings}".encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[bytes, str] | None:
+        """Return `(data, mime)` for a cached frame, or None"""
+        for mime, ext in self.EXTENSIONS.items():
+            data = self.read(f"{key}{ext}")
+            if data is None:
+                continue
+            with self._lock:
+                self.hits += 1
+            return data, mime
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes, mime: str):
+        """Store a rendered frame under `key`"""
+        self.write(f"{key}{self.EXTENSIONS.get(mime, '.bin')}", data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def passthrough_mime(data: bytes) -> str | None:
+    """MIME type if the bytes can be sent to the browser without re-encoding"""
+    try:
+        img = Image.open(io.BytesIO(data))  # Reads the header only
+    except Exception:
+        return None
+    return img.get_format_mimetype() if img.format in PASSTHROUGH_FORMATS else None
+
+
+def blur_and_encode(
+    img: Image.Image, radius: float, display_size: int, fmt: str, quality: int, max_bytes: int
+) -> tuple[bytes, str]:
+    """Blur a decoded cover and encode it for the browser"""
+    return encode(blur(img, radius, display_size), fmt, quality, max_bytes)
+
+
+# Decoded covers kept inside each worker process, keyed by source URL
+_WORKER_DECODED: OrderedDict[str, Image.Image] = OrderedDict()
+_WORKER_DECODED_MAX = 8
+
+
+def render_frame(
+    key: str,
+    data: bytes,
+    radius: float,
+    display_size: int,
+    fmt: str,
+    quality: int,
+    max_bytes: int,
+) -> tuple[bytes, str]:
+    """Process-pool task: decode (or reuse) a cover, blur it and encode it"""
+    img = _WORKER_DECODED.get(key)
+    if img is None:
+        img = decode(data)
+        _WORKER_DECODED[key] = img
+        while len(_WORKER_DECODED) > _WORKER_DECODED_MAX:
+            _WORKER_DECODED.popitem(last=False)
+    else:
+        _WORKER_DECODED.move_to_end(key)
+    return blur_and_encode(img, radius, display_size, fmt, quality, max_bytes)
+
+
+class PoolBusyError(Exception):
+    """Raised when the image worker pool has no room for more work"""
+
+
+class ImageWorkerPool:
+    """Process pool for Pillow work with a bounded number of pending tasks.
+
+    `submit` returns a `Future` to await. When `max_pending` tasks are queued
+    or running, callers wait up to `timeout` seconds for a slot (backpressure)
+    and then get `PoolBusyError`, so they can render inline or skip the work.
+    Workers are spawned rather than forked because the Streamlit server
+    process is multi-threaded.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, fn: Callable, *args, timeout: float | None = None) -> Future:
+        """Queue `fn(*args)` in a worker process, waiting for a free slot"""
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError(f"{self.max_pending} image tasks already pending")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+
+def reference_blur(img: Image.Image, radius: float, display_size: int | None = None) -> Image.Image:
+    """The original full-resolution blur path, resized for comparison"""
+    img = _as_blurrable(img)
+    if radius > 0:
+        img = img.filter(ImageFilter.GaussianBlur(radius=radius))
+    if display_size:
+        scale = display_size / max(img.size)
+        img = img.resize(
+            (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+            Image.Resampling.LANCZOS,
+        )
+    return img
+
+
+def visual_difference(a: Image.Image, b: Image.Image) -> float:
+    """Mean absolute per-channel difference between two images (0-255)"""
+    if a.size != b.size:
+        b = b.resize(a.size, Image.Resampling.LANCZOS)
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+    return sum(ImageStat.Stat(diff).mean) / 3
+
+
+def _sample_cover(size: int = 640) -> Image.Image:
+    """Deterministic high-detail test image for benchmarking without network"""
+    img = Image.new("RGB", (size, size), (24, 24, 32))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, size, 8):
+        draw.line((i, 0, size - i, size), fill=(i % 256, (i * 3) % 256, (i * 7) % 256), width=3)
+        draw.ellipse((i, i // 2, i + 40, i // 2 + 40), outline=((i * 5) % 256, 200, 90), width=2)
+    return img
+
+
+def benchmark(img: Image.Image, radii: list[int], display_size: int, repeat: int = 3) -> bool:
+    """Print timing and visual difference per radius; True if all within threshold.
+
+    The `variant` columns show which Spotify-style cover size (300 or 64px,
+    simulated by downsampling) `pick_variant` would use and its difference.
+    """
+    img = _as_blurrable(img)
+    sizes = {img.width: img}
+    for width in (300, 64):
+        if width < img.width:
+            sizes[width] = img.resize(
+                (width, round(img.height * width / img.width)), Image.Resampling.LANCZOS
+            )
+    variants = [{"url": str(width), "width": width} for width in sizes]
+
+    print(
+        f"{'radius':>6} {'reference ms':>13} {'engine ms':>10} {'speedup':>8} {'diff':>6} "
+        f"{'variant':>8} {'diff':>6}"
+    )
+    all_ok = True
+    for radius in radii:
+        ref_times, eng_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            reference = reference_blur(img, radius, display_size)
+            ref_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            result = blur(img, radius, display_size)
+            eng_times.append(time.perf_counter() - start)
+        difference = visual_difference(reference, result)
+
+        variant_url, scale = pick_variant(variants, radius)
+        variant_result = blur(sizes[int(variant_url)], radius * scale, display_size)
+        variant_difference = visual_difference(reference, variant_result)
+
+        ok = max(difference, variant_difference) <= MAX_VISUAL_DIFFERENCE
+        all_ok = all_ok and ok
+        ref_ms, eng_ms = min(ref_times) * 1000, min(eng_times) * 1000
+        print(
+            f"{radius:>6} {ref_ms:>13.1f} {eng_ms:>10.1f} {ref_ms / max(eng_ms, 1e-6):>7.1f}x "
+            f"{difference:>6.2f} {variant_url + 'px':>8} {variant_difference:>6.2f}"
+            f"{'' if ok else '  FAIL'}"
+        )
+    return all_ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point for image pipeline tools"""
+    parser = argparse.ArgumentParser(description="Song Year Guesser image tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser(
+        "benchmark", help="Compare the blur engine with full-resolution Gaussian blur"
+    )
+    bench_parser.add_argument("image", nargs="?", help="Cover image file (default: test pattern)")
+    bench_parser.add_argument("--display-size", type=int, default=450)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            img = Image.open(io.BytesIO(f.read()))
+            img.load()
+    else:
+        img = _sample_cover()
+    ok = benchmark(img, list(range(1, 26)), args.display_size, args.repeat)
+    print(f"All radii within {MAX_VISUAL_DIFFERENCE} mean difference: {'yes' if ok else 'no'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
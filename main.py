@@ -1,16 +1,21 @@
+import asyncio
 import base64
 import contextlib
-import io
+import functools
+import os
 import random
 import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
+import httpx
 import requests
 import streamlit as st
 import streamlit.components.v1 as components
-from PIL import Image, ImageFilter
+from PIL import Image
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from streamlit_autorefresh import st_autorefresh
 
 # Supabase for persistent leaderboard
@@ -21,14 +26,21 @@ try:
 except ImportError:
     SUPABASE_AVAILABLE = False
 
+import images
+from caching import BoundedCache, MemoryBudget
+from prefetch import ReadyQueue, SharedPool
+from profiling import RerunProfiler
+
 # Import UI components (explicit)
 from ui_components import (
     MAIN_CSS,
     URGENT_BUTTON_SCRIPT,
+    album_crossfade,
     album_image,
     audio_player,
     audio_visualizer,
     correct_answer_with_diff,
+    deezer_button,
     elapsed_time_receiver,
     empty_leaderboard,
     game_header,
@@ -37,6 +49,7 @@ from ui_components import (
     leaderboard_entry,
     leaderboard_header,
     main_title,
+    preload_hints,
     result_display,
     score_card,
     scroll_wheel_year_picker,
@@ -46,6 +59,15 @@ from ui_components import (
     static_timer,
     timer_html,
 )
+from upstream import (
+    AsyncUpstream,
+    CircuitBreakers,
+    CircuitOpenError,
+    LatencyTracker,
+    ResponseCache,
+    UpstreamError,
+    hedged,
+)
 
 # Pre-compiled regex patterns for performance
 _NUMBERS_PATTERN = re.compile(r"\d+")
@@ -107,8 +129,16 @@ COMPILATION_KEYWORDS = [
 ]
 
 MIN_SPOTIFY_POPULARITY = 50  # Lower threshold for more song variety
+SPOTIFY_MARKET = "US"
+MIN_DEEZER_RANK = 250_000  # Deezer ranks run to 1,000,000; chart hits sit well above this
+# Deezer allows about 50 requests per 5 seconds, so album release years (one
+# request each) are resolved a few at a time and only so many per catalog fetch
+DEEZER_ALBUM_LOOKUPS_PER_FETCH = 30
+DEEZER_ALBUM_LOOKUP_CONCURRENCY = 4
 MAX_GUESS_TIME = 30
 HINT_REVEAL_TIME = 25
+MAX_BLUR = 25
+ALBUM_DISPLAY_SIZE = 450
 
 # Genre configuration with golden age years for each genre
 GENRE_CONFIG = {
@@ -172,6 +202,27 @@ GENRE_CONFIG = {
 GENRE_LIST = list(GENRE_CONFIG.keys())
 
 
+def get_setting(section: str, key: str, default):
+    """Read an optional tuning setting from the environment or Streamlit secrets.
+
+    Environment variables named `SYG_<SECTION>_<KEY>` take precedence over
+    `[section] key` in secrets. The value is coerced to the type of `default`.
+    """
+    raw = os.environ.get(f"SYG_{section}_{key}".upper())
+    if raw is None:
+        try:
+            raw = st.secrets[section][key]
+        except Exception:
+            return default
+
+    if isinstance(default, bool):
+        return str(raw).strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return type(default)(raw)
+    except (TypeError, ValueError):
+        return default
+
+
 def is_compilation_or_remaster(text: str) -> bool:
     """Check if text suggests it's a compilation, remaster, or special edition"""
     text_lower = text.lower()
@@ -184,35 +235,37 @@ def strip_numbers_from_title(title: str) -> str:
 
 
 def get_spotify_token() -> str | None:
-    """Get Spotify access token using client credentials flow"""
+    """Get Spotify access token using client credentials flow.
+
+    The token identifies the app rather than a player, so one token is shared
+    by every session and by background prefetch workers.
+    """
     try:
         client_id = st.secrets["spotify"]["client_id"]
         client_secret = st.secrets["spotify"]["client_secret"]
     except Exception:
         return None
 
-    if (
-        "spotify_token" in st.session_state
-        and "spotify_token_expires" in st.session_state
-        and time.time() < st.session_state.spotify_token_expires
-    ):
-        return st.session_state.spotify_token
+    token = _spotify_token_cache.get(client_id)
+    if token:
+        return token
 
     try:
         auth_str = f"{client_id}:{client_secret}"
         auth_b64 = base64.b64encode(auth_str.encode()).decode()
 
-        response = requests.post(
+        response = upstream_request(
+            "POST",
             "https://accounts.spotify.com/api/token",
+            "spotify_auth",
+            timeout=5,
             headers={"Authorization": f"Basic {auth_b64}"},
             data={"grant_type": "client_credentials"},
-            timeout=5,
         )
 
         if response.status_code == 200:
             data = response.json()
-            st.session_state.spotify_token = data["access_token"]
-            st.session_state.spotify_token_expires = time.time() + data["expires_in"] - 60
+            _spotify_token_cache.set(client_id, data["access_token"], ttl=data["expires_in"] - 60)
             return data["access_token"]
     except Exception:
         pass
@@ -220,37 +273,315 @@ def get_spotify_token() -> str | None:
     return None
 
 
-_deezer_preview_cache: dict[str, str | None] = {}
+CACHE_EXPIRY_SECONDS = 60  # 1 minute - short cache for more song variety
+
+# Album art encoding: quality falls from IMAGE_QUALITY (unblurred) to
+# BLURRED_IMAGE_QUALITY (MAX_BLUR), and frames are capped at IMAGE_MAX_BYTES
+IMAGE_FORMAT = get_setting("images", "format", "webp")
+IMAGE_QUALITY = get_setting("images", "quality", 85)
+BLURRED_IMAGE_QUALITY = get_setting("images", "blurred_quality", 45)
+IMAGE_MAX_BYTES = get_setting("images", "max_kb", 48) * 1024
 
+# With keyframes enabled, only that many blur levels are rendered per song and
+# the browser crossfades between them; otherwise every integer level is used
+BLUR_KEYFRAMES = get_setting("images", "blur_keyframes", 0)
+if BLUR_KEYFRAMES:
+    BLUR_LADDER = images.keyframe_levels(MAX_BLUR, BLUR_KEYFRAMES)
+else:
+    BLUR_LADDER = range(MAX_BLUR, -1, -1)  # Every integer blur level shown during a round
 
-def get_deezer_preview(artist: str, track: str) -> str | None:
-    """Find a Deezer preview URL for a song."""
-    cache_key = f"{artist}|{track}".lower()
-    if cache_key in _deezer_preview_cache:
-        return _deezer_preview_cache[cache_key]
 
+@st.cache_resource
+def get_memory_budget() -> MemoryBudget:
+    """Create the process-wide caches and the memory budget they share.
+
+    Held in `st.cache_resource` so every session and rerun sees the same caches;
+    plain module globals in this script are recreated on every rerun.
+    """
+    budget = MemoryBudget(get_setting("cache", "memory_budget_mb", 256) * 1024 * 1024)
+    # Album art dominates memory, so it gets most of the budget before it is trimmed first
+    budget.register(
+        BoundedCache("image", policy=get_setting("cache", "image_policy", "lru"), share=6)
+    )
+    # Decoded covers are large (640x640 RGB is 1.2 MB) but save a decode per blur level
+    budget.register(
+        BoundedCache(
+            "decoded_image",
+            max_entries=get_setting("cache", "decoded_images", 16),
+            share=2,
+            sizer=images.decoded_size,
+        )
+    )
+    budget.register(
+        BoundedCache(
+            "tracks",
+            policy=get_setting("cache", "tracks_policy", "lru"),
+            ttl=CACHE_EXPIRY_SECONDS,
+            share=2,
+        )
+    )
+    # Playlists are re-resolved now and then in case Spotify publishes or renames one
+    budget.register(
+        BoundedCache(
+            "playlist",
+            policy=get_setting("cache", "playlist_policy", "lfu"),
+            ttl=get_setting("cache", "playlist_ttl_hours", 6) * 3600,
+        )
+    )
+    budget.register(
+        BoundedCache("deezer_preview", policy=get_setting("cache", "preview_policy", "lfu"))
+    )
+    # Release years never change, so albums stay cached until evicted
+    budget.register(BoundedCache("deezer_album_year", policy="lfu"))
+    budget.register(BoundedCache("spotify_token", max_entries=1))
+    return budget
+
+
+_memory_budget = get_memory_budget()
+_spotify_token_cache = _memory_budget.caches["spotify_token"]
+_deezer_preview_cache = _memory_budget.caches["deezer_preview"]
+_deezer_album_year_cache = _memory_budget.caches["deezer_album_year"]
+
+
+@st.cache_resource
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide rolling response times per upstream endpoint"""
+    return LatencyTracker()
+
+
+@st.cache_resource
+def get_async_upstream() -> AsyncUpstream:
+    """Background event loop and pooled HTTP client for all upstream requests"""
+    return AsyncUpstream(max_connections=get_setting("upstream", "max_connections", 64))
+
+
+@st.cache_resource
+def get_circuit_breakers() -> CircuitBreakers:
+    """Process-wide circuit breaker per upstream host (Spotify, Deezer, image CDN)"""
+    return CircuitBreakers(
+        min_calls=get_setting("upstream", "breaker_min_calls", 10),
+        failure_rate=get_setting("upstream", "breaker_failure_rate", 0.5),
+        open_seconds=get_setting("upstream", "breaker_open_seconds", 15.0),
+    )
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache | None:
+    """Disk cache of Spotify responses for conditional requests, or None when disabled"""
+    max_mb = get_setting("upstream", "response_cache_mb", 64)
+    if max_mb <= 0:
+        return None
+    default_dir = Path(__file__).parent / ".cache" / "http"
+    directory = get_setting("upstream", "response_cache_dir", str(default_dir))
     try:
-        query = f"{artist} {track}"
-        search_url = f"https://api.deezer.com/search?q={requests.utils.quote(query)}&limit=3"
-        response = requests.get(search_url, timeout=2)  # Faster timeout
+        return ResponseCache(directory, max_bytes=max_mb * 1024 * 1024)
+    except OSError as e:
+        print(f"WARNING: HTTP response cache disabled: {e}")
+        return None
 
-        if response.status_code == 200:
-            data = response.json()
-            for result in data.get("data", []):
-                if result.get("preview"):
-                    _deezer_preview_cache[cache_key] = result["preview"]
-                    return result["preview"]
+
+_latency = get_latency_tracker()
+_aio = get_async_upstream()
+_breakers = get_circuit_breakers()
+_response_cache = get_response_cache()
+
+UPSTREAM_TIMEOUT_FACTOR = get_setting("upstream", "timeout_factor", 3.0)
+UPSTREAM_MIN_TIMEOUT = get_setting("upstream", "min_timeout", 0.5)
+
+
+async def upstream_request_async(
+    method: str, url: str, endpoint: str, timeout: float, **kwargs
+) -> httpx.Response:
+    """Send an HTTP request through its host's circuit breaker, timing the response.
+
+    `timeout` is the ceiling: once the endpoint has enough timed responses the
+    request uses a multiple of its recent p99 instead. Raises
+    `CircuitOpenError` without sending anything while the host is failing.
+    Connection errors, timeouts, 429s and 5xx responses count as failures;
+    other responses are returned for the caller to interpret. A request
+    cancelled by its caller (a losing hedge, an expired budget) counts as
+    neither.
+    """
+    breaker = _breakers.for_url(url)
+    breaker.acquire()
+    timeout = _latency.timeout(endpoint, timeout, UPSTREAM_TIMEOUT_FACTOR, UPSTREAM_MIN_TIMEOUT)
+    started = time.monotonic()
+    try:
+        response = await _aio.client.request(method, url, timeout=timeout, **kwargs)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
     except Exception:
-        pass
+        _latency.record(endpoint, time.monotonic() - started)
+        breaker.record(False)
+        raise
+    _latency.record(endpoint, time.monotonic() - started)
+    breaker.record(response.status_code < 500 and response.status_code != 429)
+    return response
+
+
+def upstream_request(
+    method: str, url: str, endpoint: str, timeout: float, **kwargs
+) -> httpx.Response:
+    """Blocking `upstream_request_async` for script and worker threads"""
+    return _aio.run(upstream_request_async(method, url, endpoint, timeout, **kwargs))
+
+
+async def cached_get_async(
+    url: str, endpoint: str, timeout: float, market: str = "", headers: dict | None = None
+) -> httpx.Response:
+    """GET a URL, revalidating a copy in the response cache instead of downloading it again.
+
+    A stored response is sent as a conditional request; a 304 answer is
+    returned to the caller as the stored 200 response.
+    """
+    if _response_cache is None:
+        return await upstream_request_async("GET", url, endpoint, timeout, headers=headers)
+    stored = await asyncio.to_thread(_response_cache.get, url, market)
+    headers = dict(headers or {})
+    if stored is not None:
+        headers.update(ResponseCache.validators(stored[0]))
+    response = await upstream_request_async("GET", url, endpoint, timeout, headers=headers)
+    if response.status_code == 304 and stored is not None:
+        stored_headers, body = stored
+        _response_cache.record(hit=True, size=len(body))
+        return httpx.Response(200, headers=stored_headers, content=body, request=response.request)
+    if response.status_code == 200:
+        _response_cache.record(hit=False)
+        try:
+            await asyncio.to_thread(
+                _response_cache.put, url, market, response.headers, response.content
+            )
+        except OSError as e:
+            print(f"WARNING: Could not write the HTTP response to the response cache: {e}")
+    return response
+
+
+def cached_get(
+    url: str, endpoint: str, timeout: float, market: str = "", headers: dict | None = None
+) -> httpx.Response:
+    """Blocking `cached_get_async` for script and worker threads"""
+    return _aio.run(cached_get_async(url, endpoint, timeout, market, headers))
+
+
+def cached_get_all(
+    urls: list[str], endpoint: str, timeout: float, market: str = "", headers: dict | None = None
+) -> list:
+    """`cached_get` several URLs concurrently; each entry is a response or the exception raised"""
+
+    async def fetch_all():
+        fetches = [cached_get_async(url, endpoint, timeout, market, headers) for url in urls]
+        return await asyncio.gather(*fetches, return_exceptions=True)
+
+    return _aio.run(fetch_all())
+
+
+# Hedge a Deezer search after this long until enough responses have been timed
+DEEZER_HEDGE_DEFAULT_SECONDS = 0.8
+# Songs Deezer has no preview for are retried after this long
+DEEZER_MISS_TTL_SECONDS = 600
+# Preview URLs are signed and expire, so a found one is kept no longer than a pooled song
+DEEZER_PREVIEW_TTL_SECONDS = get_setting("songs", "pool_max_age", 600)
+DEEZER_NO_DATA = 800  # Deezer's error code for an item that does not exist
+_NOT_CACHED = object()
+
+
+def _deezer_payload(response: httpx.Response) -> dict | None:
+    """JSON body of a Deezer response, or None for "no data".
+
+    Deezer reports most errors, rate limiting included, as HTTP 200 with an
+    `error` object; those and non-200 statuses raise `UpstreamError`.
+    """
+    if response.status_code != 200:
+        raise UpstreamError(f"Deezer returned HTTP {response.status_code}")
+    data = response.json()
+    error = data.get("error")
+    if error:
+        if error.get("code") == DEEZER_NO_DATA:
+            return None
+        raise UpstreamError(f"Deezer error {error.get('code')}: {error.get('message')}")
+    return data
+
+
+def get_deezer_preview(artist: str, track: str, isrc: str | None = None) -> str | None:
+    """Find a Deezer preview URL for a song."""
+    return _aio.run(get_deezer_preview_async(artist, track, isrc))
+
+
+async def get_deezer_preview_async(artist: str, track: str, isrc: str | None = None) -> str | None:
+    """Find a Deezer preview URL for a song without blocking the event loop.
+
+    With an `isrc` the exact recording is looked up first and the result is
+    cached by ISRC; the fuzzy artist and title search is only a fallback.
+    """
+    isrc = isrc.strip().upper() if isrc else None
+    cache_key = f"isrc:{isrc}" if isrc else f"{artist}|{track}".lower()
+    preview_url = _deezer_preview_cache.get(cache_key, _NOT_CACHED)
+    if preview_url is not _NOT_CACHED:
+        return preview_url
+
+    async def search() -> str | None:
+        # A lookup slower than the usual p95 is raced against a duplicate
+        hedge_after = _latency.percentile("deezer", 0.95, DEEZER_HEDGE_DEFAULT_SECONDS)
+        lookups = [lambda: _search_deezer_preview(artist, track)]
+        if isrc:
+            lookups.insert(0, lambda: _lookup_deezer_isrc(isrc))
+        failed = False
+        for lookup in lookups:
+            try:
+                preview_url = await hedged(lookup, hedge_after)
+            except CircuitOpenError:
+                # Not a real miss: raise so the outage is not cached as "no preview"
+                raise
+            except Exception:
+                # Timeouts, rate limits and other errors say nothing about the song
+                failed = True
+                continue
+            if preview_url is not None:
+                _deezer_preview_cache.set(cache_key, preview_url, ttl=DEEZER_PREVIEW_TTL_SECONDS)
+                return preview_url
+        if not failed:
+            _deezer_preview_cache.set(cache_key, None, ttl=DEEZER_MISS_TTL_SECONDS)
+        return None
+
+    # Concurrent lookups for the same song share one Deezer request
+    return await _aio.coalesce(("deezer", cache_key), search)
+
+
+async def _lookup_deezer_isrc(isrc: str) -> str | None:
+    """Fetch the Deezer track with this ISRC and return its preview URL.
+
+    Returns None when Deezer has no such track or it has no preview; raises
+    on errors so a failed lookup is not mistaken for a miss.
+    """
+    lookup_url = f"https://api.deezer.com/track/isrc:{requests.utils.quote(isrc)}"
+    response = await upstream_request_async("GET", lookup_url, "deezer", timeout=2)
+    track = _deezer_payload(response)
+    return (track or {}).get("preview") or None
+
+
+async def _search_deezer_preview(artist: str, track: str) -> str | None:
+    """Search Deezer for a song and return the first preview URL found.
+
+    Returns None when no result has a preview; raises on errors so a failed
+    search is not mistaken for a miss.
+    """
+    query = f"{artist} {track}"
+    search_url = f"https://api.deezer.com/search?q={requests.utils.quote(query)}&limit=3"
+    # Faster timeout
+    response = await upstream_request_async("GET", search_url, "deezer", timeout=2)
+    data = _deezer_payload(response) or {}
+    for result in data.get("data", []):
+        if result.get("preview"):
+            return result["preview"]
 
-    _deezer_preview_cache[cache_key] = None
     return None
 
 
-_playlist_cache: dict[int, str | None] = {}
-_tracks_cache: dict[int, tuple[float, list[dict]]] = {}
-_image_cache: dict[str, str] = {}
-CACHE_EXPIRY_SECONDS = 60  # 1 minute - short cache for more song variety
+_playlist_cache = _memory_budget.caches["playlist"]
+_tracks_cache = _memory_budget.caches["tracks"]
+_image_cache = _memory_budget.caches["image"]
+_decoded_image_cache = _memory_budget.caches["decoded_image"]
 
 # Leaderboard storage - uses Supabase if configured, falls back to session state
 MAX_LEADERBOARD_ENTRIES = 20
@@ -299,13 +630,6 @@ def get_supabase_client() -> "Client | None":
         return None
 
 
-def clear_song_cache():
-    """Clear all cached songs to get fresh selections"""
-    global _tracks_cache, _playlist_cache
-    _tracks_cache.clear()
-    _playlist_cache.clear()
-
-
 def load_leaderboard() -> list[dict]:
     """Load leaderboard from Supabase or session state"""
     # Try Supabase first
@@ -450,42 +774,49 @@ def add_to_leaderboard(
 
 
 def search_top_hits_playlist(year: int, token: str) -> str | None:
-    """Search for Spotify's official Top Hits playlist for a year."""
-    if year in _playlist_cache:
-        return _playlist_cache[year]
+    """Search for Spotify's official Top Hits playlist for a year.
+
+    Only a completed search is cached, including one that found no playlist;
+    upstream errors raise and are retried on the next call.
+    """
+    return _playlist_cache.get_or_compute(year, lambda: _find_top_hits_playlist(year, token))
 
+
+def _find_top_hits_playlist(year: int, token: str) -> str | None:
+    """Query Spotify for the best Top Hits playlist id for a year.
+
+    Returns None when no playlist matches; raises `UpstreamError` (or the
+    request's own error) when the search itself fails.
+    """
     headers = {"Authorization": f"Bearer {token}"}
 
-    try:
-        query = f"Top Hits {year}"
-        search_url = f"https://api.spotify.com/v1/search?q={requests.utils.quote(query)}&type=playlist&limit=20"
-        response = requests.get(search_url, headers=headers, timeout=5)
+    query = f"Top Hits {year}"
+    search_url = (
+        f"https://api.spotify.com/v1/search?q={requests.utils.quote(query)}&type=playlist&limit=20"
+    )
+    response = cached_get(search_url, "spotify", timeout=5, market=SPOTIFY_MARKET, headers=headers)
+    if response.status_code != 200:
+        raise UpstreamError(f"Spotify playlist search returned HTTP {response.status_code}")
 
-        if response.status_code == 200:
-            data = response.json()
-            playlists = data.get("playlists", {}).get("items", [])
+    data = response.json()
+    playlists = data.get("playlists", {}).get("items", [])
 
-            for playlist in playlists:
-                if not playlist:
-                    continue
-                name = playlist.get("name", "").lower()
-                owner = playlist.get("owner", {}).get("display_name", "").lower()
+    for playlist in playlists:
+        if not playlist:
+            continue
+        name = playlist.get("name", "").lower()
+        owner = playlist.get("owner", {}).get("display_name", "").lower()
 
-                if "spotify" in owner and str(year) in name:
-                    _playlist_cache[year] = playlist["id"]
-                    return playlist["id"]
+        if "spotify" in owner and str(year) in name:
+            return playlist["id"]
 
-            for playlist in playlists:
-                if not playlist:
-                    continue
-                name = playlist.get("name", "").lower()
-                if "top" in name and str(year) in name and ("hit" in name or "100" in name):
-                    _playlist_cache[year] = playlist["id"]
-                    return playlist["id"]
-    except Exception:
-        pass
+    for playlist in playlists:
+        if not playlist:
+            continue
+        name = playlist.get("name", "").lower()
+        if "top" in name and str(year) in name and ("hit" in name or "100" in name):
+            return playlist["id"]
 
-    _playlist_cache[year] = None
     return None
 
 
@@ -505,33 +836,59 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
         year: The year to search for songs
         genre_query: Optional genre search terms (e.g., "rock", "pop")
     """
-    cache_key = f"{year}_{genre_query}"
-    if cache_key in _tracks_cache:
-        cache_time, cached_tracks = _tracks_cache[cache_key]
-        if time.time() - cache_time < CACHE_EXPIRY_SECONDS:
-            # IMPORTANT: Shuffle on every retrieval to avoid repeating songs
-            shuffled = cached_tracks.copy()
-            random.shuffle(shuffled)
-            return shuffled
-
-    token = get_spotify_token()
-    if not token:
-        return []
+    # Scoped by genre and year so one player's selection never evicts another's
+    cache_key = (genre_query, year)
+    cached_tracks = _tracks_cache.get(cache_key)
+    if cached_tracks is None:
+        token = get_spotify_token()
+        if not token:
+            return []
+        try:
+            # Sessions starting the same genre at once wait on a single fetch
+            cached_tracks = _tracks_cache.get_or_compute(
+                cache_key, lambda: _fetch_songs_from_spotify(year, genre_query, token)
+            )
+        except CircuitOpenError:
+            # Spotify is failing: only years that are still cached can be played
+            return []
+
+    # IMPORTANT: Shuffle on every retrieval to avoid repeating songs
+    shuffled = cached_tracks.copy()
+    random.shuffle(shuffled)
+    return shuffled
+
+
+def _image_variants(images: list[dict]) -> list[dict]:
+    """Keep every cover size Spotify lists (typically 640, 300 and 64px)"""
+    return [
+        {"url": image["url"], "width": image.get("width") or 0}
+        for image in images
+        if image.get("url")
+    ]
+
 
+def _fetch_songs_from_spotify(year: int, genre_query: str, token: str) -> list[dict]:
+    """Fetch and filter candidate tracks for a year from Spotify"""
     headers = {"Authorization": f"Bearer {token}"}
     tracks = []
 
     # Only use playlist for "All Genres" - otherwise go straight to genre search
     playlist_id = None
     if not genre_query:
-        playlist_id = search_top_hits_playlist(year, token)
+        try:
+            playlist_id = search_top_hits_playlist(year, token)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            # Not cached: this fetch falls back to search and the next one retries
+            print(f"WARNING: Top Hits playlist search for {year} failed: {e}")
 
     if playlist_id:
         try:
-            playlist_url = (
-                f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks?limit=100&market=US"
+            playlist_url = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks?limit=100&market={SPOTIFY_MARKET}"
+            response = cached_get(
+                playlist_url, "spotify", timeout=5, market=SPOTIFY_MARKET, headers=headers
             )
-            response = requests.get(playlist_url, headers=headers, timeout=5)
 
             if response.status_code == 200:
                 data = response.json()
@@ -561,6 +918,7 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
 
                     images = album.get("images", [])
                     image_url = images[0]["url"] if images else None
+                    image_variants = _image_variants(images)
 
                     release_date = album.get("release_date", "")
                     album_year = int(release_date[:4]) if len(release_date) >= 4 else year
@@ -578,8 +936,10 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
                             "album": album_name,
                             "year": album_year,
                             "image_url": image_url,
+                            "image_variants": image_variants,
                             "popularity": popularity,
                             "spotify_id": track["id"],
+                            "isrc": track.get("external_ids", {}).get("isrc"),
                             "song_key": song_key,
                         }
                     )
@@ -589,15 +949,24 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
     if not tracks:
         try:
             # Fetch multiple pages of search results for better variety
+            search_urls = []
             for offset in range(0, 300, 50):  # Get up to 300 results (6 pages of 50)
                 # Include genre in search if specified
                 if genre_query:
-                    search_url = f"https://api.spotify.com/v1/search?q={requests.utils.quote(genre_query)}+year:{year}&type=track&limit=50&offset={offset}&market=US"
+                    search_url = f"https://api.spotify.com/v1/search?q={requests.utils.quote(genre_query)}+year:{year}&type=track&limit=50&offset={offset}&market={SPOTIFY_MARKET}"
                 else:
                     search_url = (
-                        f"https://api.spotify.com/v1/search?q=year:{year}&type=track&limit=50&offset={offset}&market=US"
+                        f"https://api.spotify.com/v1/search?q=year:{year}&type=track&limit=50&offset={offset}&market={SPOTIFY_MARKET}"
                     )
-                response = requests.get(search_url, headers=headers, timeout=5)
+                search_urls.append(search_url)
+
+            # All pages are requested at once, then read in order
+            pages = cached_get_all(
+                search_urls, "spotify", timeout=5, market=SPOTIFY_MARKET, headers=headers
+            )
+            for response in pages:
+                if isinstance(response, Exception):
+                    raise response
 
                 if response.status_code == 200:
                     data = response.json()
@@ -633,6 +1002,7 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
 
                         images = album.get("images", [])
                         image_url = images[0]["url"] if images else None
+                        image_variants = _image_variants(images)
 
                         # Pre-compute lowercased strings for song key
                         artist_lower = artist_name.lower()
@@ -647,11 +1017,17 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
                                 "album": album_name,
                                 "year": album_year,
                                 "image_url": image_url,
+                                "image_variants": image_variants,
                                 "popularity": popularity,
                                 "spotify_id": item["id"],
+                                "isrc": item.get("external_ids", {}).get("isrc"),
                                 "song_key": song_key,
                             }
                         )
+        except CircuitOpenError:
+            if not tracks:
+                # Keep the outage out of the tracks cache
+                raise
         except Exception:
             pass
 
@@ -667,15 +1043,212 @@ def get_songs_from_spotify(year: int, genre_query: str = "") -> list[dict]:
     # Shuffle before caching for better randomness
     random.shuffle(tracks)
 
-    result = tracks[:300]  # Keep up to 300 songs for better variety
-    cache_key = f"{year}_{genre_query}"
-    _tracks_cache[cache_key] = (time.time(), result)
-    return result
+    return tracks[:300]  # Keep up to 300 songs for better variety
+
+
+def get_songs_from_deezer(year: int, genre_query: str = "") -> list[dict]:
+    """Get popular songs from a specific year using Deezer playlists.
+
+    Tracks come with their preview URL, so songs from this catalog need no
+    separate preview lookup. No credentials are required.
+    """
+    cache_key = ("deezer", genre_query, year)
+    try:
+        cached_tracks, complete = _tracks_cache.get_or_compute(
+            cache_key, lambda: _aio.run(_fetch_songs_from_deezer(year, genre_query))
+        )
+        if not complete:
+            # Some album years are still unknown: play from this list, but fetch
+            # again next round so those albums' tracks are not left out
+            _tracks_cache.pop(cache_key)
+    except CircuitOpenError:
+        # Deezer is failing: only years that are still cached can be played
+        return []
+    except Exception as e:
+        # Not cached, so the next round tries again
+        print(f"WARNING: Deezer catalog fetch for {year} failed: {e}")
+        return []
+
+    shuffled = cached_tracks.copy()
+    random.shuffle(shuffled)
+    return shuffled
+
+
+async def _fetch_songs_from_deezer(year: int, genre_query: str) -> tuple[list[dict], bool]:
+    """Fetch and filter candidate tracks for a year from Deezer playlists.
+
+    Returns the tracks and whether the list is complete: False when a
+    playlist could not be read or an album's release year could not be looked
+    up, since those tracks are left out.
+    """
+    query = f"{genre_query} {year}" if genre_query else f"Top Hits {year}"
+    search_url = f"https://api.deezer.com/search/playlist?q={requests.utils.quote(query)}&limit=10"
+    response = await upstream_request_async("GET", search_url, "deezer_catalog", timeout=5)
+    playlists = (_deezer_payload(response) or {}).get("data", [])
+    # Prefer playlists named for the year; the album year check below is what counts
+    playlists.sort(key=lambda playlist: str(year) not in playlist.get("title", ""))
+
+    playlist_urls = [
+        f"https://api.deezer.com/playlist/{playlist['id']}/tracks?limit=100"
+        for playlist in playlists[:3]
+    ]
+    pages = await asyncio.gather(
+        *(upstream_request_async("GET", url, "deezer_catalog", timeout=5) for url in playlist_urls),
+        return_exceptions=True,
+    )
+
+    candidates = []
+    pages_complete = True
+    for page in pages:
+        try:
+            if isinstance(page, Exception):
+                raise page
+            items = (_deezer_payload(page) or {}).get("data", [])
+        except Exception:
+            pages_complete = False
+            continue
+        for item in items:
+            preview_url = item.get("preview")
+            if not preview_url or not item.get("readable", True):
+                continue
+
+            album = item.get("album", {})
+            track_name = item.get("title_short") or item.get("title", "")
+            album_name = album.get("title", "")
+            if is_compilation_or_remaster(album_name) or is_compilation_or_remaster(
+                item.get("title", "")
+            ):
+                continue
+
+            rank = item.get("rank", 0)
+            if rank < MIN_DEEZER_RANK:
+                continue
+
+            artist_name = item.get("artist", {}).get("name", "Unknown")
+            if not is_likely_english(track_name, artist_name):
+                continue
+
+            candidates.append((item, album, track_name, album_name, artist_name, preview_url))
+
+    # Most popular albums first, so a capped fetch still covers the biggest hits
+    by_rank = sorted(candidates, key=lambda candidate: candidate[0].get("rank", 0), reverse=True)
+    album_ids = list(dict.fromkeys(album["id"] for _, album, *_ in by_rank if "id" in album))
+    album_years = {album_id: _deezer_album_year_cache.get(album_id) for album_id in album_ids}
+    missing = [album_id for album_id, album_year in album_years.items() if album_year is None]
+    to_look_up = missing[:DEEZER_ALBUM_LOOKUPS_PER_FETCH]
+    complete = pages_complete and len(missing) == len(to_look_up)
+    slots = asyncio.Semaphore(DEEZER_ALBUM_LOOKUP_CONCURRENCY)
+    failed = False
+
+    async def look_up(album_id: int) -> int | None:
+        nonlocal failed
+        async with slots:
+            if failed:
+                # Rate limited or failing: stop asking until the next fetch
+                return None
+            try:
+                return await _deezer_album_year(album_id)
+            except Exception:
+                failed = True
+                return None
+
+    years = await asyncio.gather(*(look_up(album_id) for album_id in to_look_up))
+    album_years.update(zip(to_look_up, years, strict=True))
+    complete = complete and not failed
+
+    tracks = []
+    seen_keys = set()
+    for item, album, track_name, album_name, artist_name, preview_url in candidates:
+        # Same rule as the Spotify search: only songs released that year
+        if album_years.get(album.get("id")) != year:
+            continue
+        song_key = f"{artist_name.lower()}|{track_name.lower()}"
+        if song_key in seen_keys:
+            continue
+        seen_keys.add(song_key)
+        image_variants = [
+            {"url": album[field], "width": width}
+            for field, width in (("cover_big", 500), ("cover_medium", 250), ("cover_small", 56))
+            if album.get(field)
+        ]
+        tracks.append(
+            {
+                "id": str(item["id"]),
+                "name": track_name,
+                "artist": artist_name,
+                "album": album_name,
+                "year": year,
+                "image_url": image_variants[0]["url"] if image_variants else None,
+                "image_variants": image_variants,
+                # Deezer rank scaled to Spotify's 0-100 popularity
+                "popularity": min(100, item.get("rank", 0) // 10_000),
+                "spotify_id": None,
+                "isrc": None,
+                "song_key": song_key,
+                "catalog": "deezer",
+                "deezer_id": item["id"],
+                "preview_url": preview_url,
+            }
+        )
+
+    random.shuffle(tracks)
+    return tracks[:300], complete
+
+
+async def _deezer_album_year(album_id: int) -> int | None:
+    """Release year of a Deezer album, cached for the life of the process.
+
+    Returns None for an album with no usable release date; raises when the
+    lookup fails, including when Deezer's rate limit rejects it.
+    """
+    response = await upstream_request_async(
+        "GET", f"https://api.deezer.com/album/{album_id}", "deezer_catalog", timeout=5
+    )
+    release_date = (_deezer_payload(response) or {}).get("release_date", "")
+    if len(release_date) < 4:
+        return None
+    year = int(release_date[:4])
+    _deezer_album_year_cache.set(album_id, year)
+    return year
+
+
+# Catalog providers by `songs.catalog` setting; each returns shuffled track dicts
+CATALOG_PROVIDERS = {"spotify": get_songs_from_spotify, "deezer": get_songs_from_deezer}
+SONG_CATALOG = get_setting("songs", "catalog", "spotify")
+if SONG_CATALOG not in CATALOG_PROVIDERS:
+    print(f"WARNING: Unknown song catalog {SONG_CATALOG!r}, using Spotify")
+    SONG_CATALOG = "spotify"
 
 
-def _fetch_deezer_preview(track: dict) -> tuple[dict, str | None]:
+def get_catalog_songs(year: int, genre_query: str = "") -> list[dict]:
+    """Candidate tracks for a year from the configured catalog provider"""
+    return CATALOG_PROVIDERS[SONG_CATALOG](year, genre_query)
+
+
+def _song_from_track(track: dict, preview_url: str) -> dict:
+    """The song dict a round is played with, from a catalog track and its preview"""
+    if track.get("catalog") == "deezer":
+        listen_url = f"https://www.deezer.com/track/{track['deezer_id']}"
+    else:
+        listen_url = f"https://open.spotify.com/track/{track['spotify_id']}"
+    return {
+        "id": track["id"],
+        "name": strip_numbers_from_title(track["name"]),
+        "artist": track["artist"],
+        "album": track["album"],
+        "year": track["year"],
+        "preview_url": preview_url,
+        "image_url": track["image_url"],
+        "image_variants": track.get("image_variants", []),
+        "deezer_url": listen_url,
+        "catalog": track.get("catalog", "spotify"),
+        "song_key": track.get("song_key", f"{track['artist'].lower()}|{track['name'].lower()}"),
+    }
+
+
+async def _fetch_deezer_preview(track: dict) -> tuple[dict, str | None]:
     """Helper to fetch Deezer preview for a track"""
-    preview_url = get_deezer_preview(track["artist"], track["name"])
+    preview_url = await get_deezer_preview_async(track["artist"], track["name"], track.get("isrc"))
     return (track, preview_url)
 
 
@@ -685,18 +1258,26 @@ def get_random_song(
     played_ids: set | None = None,
     played_keys: set | None = None,
     genre_query: str = "",
+    budget: float | None = None,
 ) -> dict | None:
-    """Get a random popular song from the specified year range."""
+    """Get a random popular song from the specified year range.
+
+    With a `budget` in seconds, gives up and returns None once it is spent
+    rather than walking every year; callers fall back to prepared songs.
+    """
     if played_ids is None:
         played_ids = set()
     if played_keys is None:
         played_keys = set()
+    deadline = time.monotonic() + budget if budget is not None else None
 
     years_to_try = list(range(start_year, end_year + 1))
     random.shuffle(years_to_try)
 
     for year in years_to_try:
-        tracks = get_songs_from_spotify(year, genre_query)
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        tracks = get_catalog_songs(year, genre_query)
 
         if not tracks:
             continue
@@ -716,70 +1297,266 @@ def get_random_song(
         random.shuffle(available_tracks)
         candidates = available_tracks[:20]  # Try more candidates for better variety
 
-        with ThreadPoolExecutor(max_workers=8) as executor:  # Increased parallelism
-            futures = {executor.submit(_fetch_deezer_preview, t): t for t in candidates}
+        # Catalogs that ship previews inline need no lookup
+        for track in candidates:
+            if track.get("preview_url"):
+                return _song_from_track(track, track["preview_url"])
 
-            for future in as_completed(futures):
+        # Every candidate is looked up at once on the upstream event loop
+        futures = {_aio.submit(_fetch_deezer_preview(t)): t for t in candidates}
+        remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        try:
+            for future in as_completed(futures, timeout=remaining):
                 try:
                     track, preview_url = future.result()
                     if preview_url:
-                        for f in futures:
-                            f.cancel()
-                        return {
-                            "id": track["id"],
-                            "name": strip_numbers_from_title(track["name"]),
-                            "artist": track["artist"],
-                            "album": track["album"],
-                            "year": track["year"],
-                            "preview_url": preview_url,
-                            "image_url": track["image_url"],
-                            "deezer_url": f"https://open.spotify.com/track/{track['spotify_id']}",
-                            "song_key": track.get(
-                                "song_key", f"{track['artist'].lower()}|{track['name'].lower()}"
-                            ),
-                        }
+                        return _song_from_track(track, preview_url)
                 except Exception:
                     continue
+        except TimeoutError:
+            # Budget spent; lookups still running finish in the background and
+            # warm the preview cache for the next attempt
+            break
 
     return None
 
 
-def blur_image(image_url: str, blur_amount: int) -> str:
-    """Download image and apply blur effect, return as base64."""
-    # Always use the exact blur amount requested - don't use cached unblurred versions
-    cache_key = f"{image_url}_{blur_amount}"
+@st.cache_resource
+def get_static_image_store() -> images.StaticImageStore | None:
+    """Static album art store, or None when static file serving is unavailable"""
+    if not get_setting("images", "static", True):
+        return None
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    try:
+        return images.StaticImageStore(
+            Path(__file__).parent / "static" / "art",
+            "app/static/art",
+            max_bytes=get_setting("images", "static_max_mb", 256) * 1024 * 1024,
+        )
+    except OSError as e:
+        print(f"WARNING: Static album art disabled, falling back to data URIs: {e}")
+        return None
+
+
+_static_image_store = get_static_image_store()
 
-    if cache_key in _image_cache:
-        return _image_cache[cache_key]
 
+@st.cache_resource
+def get_frame_cache() -> images.FrameCache | None:
+    """Disk cache of rendered frames, or None when disabled"""
+    max_mb = get_setting("images", "disk_cache_mb", 512)
+    if max_mb <= 0:
+        return None
+    default_dir = Path(__file__).parent / ".cache" / "frames"
+    directory = get_setting("images", "disk_cache_dir", str(default_dir))
     try:
-        original_key = f"{image_url}_original"
-        if original_key in _image_cache:
-            img_data = base64.b64decode(_image_cache[original_key])
-            img = Image.open(io.BytesIO(img_data))
-        else:
-            response = requests.get(image_url, timeout=3)
-            img = Image.open(io.BytesIO(response.content))
-            buffered = io.BytesIO()
-            img.save(buffered, format="PNG")
-            _image_cache[original_key] = base64.b64encode(buffered.getvalue()).decode()
-
-        # Always apply blur if requested, even if blur_amount is 0 (for consistency)
-        if blur_amount > 0:
-            img = img.filter(ImageFilter.GaussianBlur(radius=blur_amount))
-        # If blur_amount is 0, return unblurred (but still cached separately)
-
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        result = f"data:image/png;base64,{img_str}"
-
-        _image_cache[cache_key] = result
+        return images.FrameCache(directory, max_bytes=max_mb * 1024 * 1024)
+    except OSError as e:
+        print(f"WARNING: Frame disk cache disabled: {e}")
+        return None
+
+
+_frame_cache = get_frame_cache()
+# Anything that changes how a frame is rendered, so stale frames are never reused
+FRAME_SETTINGS = (
+    f"{IMAGE_FORMAT}:{IMAGE_QUALITY}:{BLURRED_IMAGE_QUALITY}:{IMAGE_MAX_BYTES}:{ALBUM_DISPLAY_SIZE}"
+)
+
+
+def _publish_image(data: bytes, mime: str) -> str:
+    """Return an image source: a cacheable static URL, or an inline data URI"""
+    if _static_image_store is not None:
+        try:
+            return _static_image_store.put(data, mime)
+        except OSError as e:
+            print(f"WARNING: Could not write static album art: {e}")
+    return images.data_uri(data, mime)
+
+
+def _load_original_image(image_url: str) -> bytes:
+    """Download an album cover and return its untouched bytes"""
+    response = upstream_request("GET", image_url, "images", timeout=3)
+    response.raise_for_status()
+    return response.content
+
+
+def _get_original_image(image_url: str) -> bytes:
+    """Raw cover bytes, downloaded once and shared by every blur level"""
+    return _image_cache.get_or_compute(
+        f"{image_url}_original", lambda: _load_original_image(image_url)
+    )
+
+
+def _get_decoded_image(image_url: str) -> Image.Image:
+    """Decoded cover held in a small LRU so new blur levels skip the decode"""
+    return _decoded_image_cache.get_or_compute(
+        image_url, lambda: images.decode(_get_original_image(image_url))
+    )
+
+
+def _render_frame(
+    image_url: str, blur_amount: int, variants: list[dict] | None = None
+) -> tuple[bytes, str]:
+    """Blur the cached original cover and encode it, returning `(data, mime)`"""
+    # Heavily blurred frames come from a smaller cover variant; the full-size
+    # image is only downloaded for light blur and the final reveal
+    source_url, scale = images.pick_variant(variants or [], blur_amount) or (image_url, 1.0)
+    original = _get_original_image(source_url)
+
+    if blur_amount <= 0:
+        mime = images.passthrough_mime(original)
+        if mime:
+            # The unblurred reveal is the downloaded cover, byte for byte
+            return original, mime
+
+    # Large radii are blurred at reduced scale and resampled to the display size
+    quality = images.quality_for_blur(blur_amount, MAX_BLUR, IMAGE_QUALITY, BLURRED_IMAGE_QUALITY)
+    frame_args = (blur_amount * scale, ALBUM_DISPLAY_SIZE, IMAGE_FORMAT, quality, IMAGE_MAX_BYTES)
+    if _image_pool is not None:
+        # Script threads wait at most 0.5s in total, for a slot and then for the
+        # result; background ladder threads block
+        timeout = None if get_script_run_ctx(suppress_warning=True) is None else 0.5
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            future = _image_pool.submit(
+                images.render_frame, source_url, original, *frame_args, timeout=timeout
+            )
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            return future.result(remaining)
+        except images.PoolBusyError:
+            pass
+        except TimeoutError:
+            # Still queued behind other renders: drop it unless a worker already started it
+            future.cancel()
+    # No process pool (or it is saturated or slow): render in this thread
+    return images.blur_and_encode(_get_decoded_image(source_url), *frame_args)
+
+
+def _render_blur(image_url: str, blur_amount: int, variants: list[dict] | None = None) -> str:
+    """Render one blur level, reusing the disk frame cache, and publish it"""
+    if _frame_cache is None:
+        return _publish_image(*_render_frame(image_url, blur_amount, variants))
+
+    key = images.FrameCache.key(image_url, blur_amount, FRAME_SETTINGS)
+    frame = _frame_cache.get(key)
+    if frame is None:
+        frame = _render_frame(image_url, blur_amount, variants)
+        try:
+            _frame_cache.put(key, *frame)
+        except OSError as e:
+            print(f"WARNING: Could not write album art to the frame cache: {e}")
+    return _publish_image(*frame)
+
+
+def blur_image(image_url: str, blur_amount: int, variants: list[dict] | None = None) -> str:
+    """Download image and apply blur effect, return a static URL or base64 data URI.
+
+    `variants` lists the other sizes of the same cover (see `_image_variants`);
+    when given, high blur levels are rendered from the smallest suitable one.
+    """
+    # Always use the exact blur amount requested - don't use cached unblurred versions
+    cache_key = f"{image_url}_{blur_amount}"
+    try:
+        # Waits for the ladder worker if this level is already being rendered
+        result = _image_cache.get_or_compute(
+            cache_key, lambda: _render_blur(image_url, blur_amount, variants)
+        )
+        if (
+            _static_image_store is not None
+            and not result.startswith("data:")
+            and not _static_image_store.contains(result)
+        ):
+            # The static file was pruned from disk; render it again
+            _image_cache.pop(cache_key)
+            result = _image_cache.get_or_compute(
+                cache_key, lambda: _render_blur(image_url, blur_amount, variants)
+            )
         return result
     except Exception:
         return ""
 
 
+@st.cache_resource
+def get_image_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool for rendering blur ladders"""
+    return ThreadPoolExecutor(
+        max_workers=get_setting("images", "workers", 4), thread_name_prefix="blur-ladder"
+    )
+
+
+@st.cache_resource
+def get_image_pool() -> images.ImageWorkerPool | None:
+    """Process pool for blur and encode work, or None to render in-thread"""
+    workers = get_setting("images", "processes", min(4, (os.cpu_count() or 1) - 1))
+    if workers <= 0:
+        return None
+    return images.ImageWorkerPool(
+        workers, max_pending=get_setting("images", "max_pending", workers * 4)
+    )
+
+
+_image_pool = get_image_pool()
+
+
+def warm_blur_ladder(
+    image_url: str, variants: list[dict] | None = None, block_first_frame: bool = True
+) -> list[Future]:
+    """Render every blur level for an album in one batch on the image worker pool.
+
+    The round starts at `MAX_BLUR`, so by default that frame is rendered before
+    returning; the remaining levels finish in the background and every later
+    rerun during play is a cache hit. Ladder threads only coordinate caching;
+    the Pillow work itself runs in the process pool when one is configured.
+    """
+    if block_first_frame:
+        blur_image(image_url, MAX_BLUR, variants)
+    executor = get_image_executor()
+    return [executor.submit(blur_image, image_url, level, variants) for level in BLUR_LADDER]
+
+
+def render_album_crossfade(song: dict, blur_amount: float):
+    """Show the album as stacked blur keyframes crossfaded by opacity.
+
+    Layer sources stay the same for the whole round, so the browser downloads
+    each keyframe once and reruns only change opacities, which CSS transitions
+    smooth over the refresh interval. Sharper layers that are still rendering
+    and not yet visible are left out until a later rerun.
+    """
+    opacities = images.keyframe_opacities(BLUR_LADDER, blur_amount)
+    layers = []
+    for level, opacity in zip(BLUR_LADDER, opacities, strict=True):
+        if opacity <= 0 and f"{song['image_url']}_{level}" not in _image_cache:
+            break
+        src = blur_image(song["image_url"], level, song.get("image_variants"))
+        if not src:
+            break
+        layers.append((src, opacity))
+    if layers:
+        st.markdown(album_crossfade(layers, ALBUM_DISPLAY_SIZE), unsafe_allow_html=True)
+
+
+def render_next_song_preloads():
+    """Have the browser fetch the next prepared song's audio and first frame.
+
+    The next round then starts from the HTTP cache instead of waiting on the
+    Deezer preview to buffer. Inline data URI frames gain nothing from a
+    preload and are skipped.
+    """
+    queue = st.session_state.get("song_queue")
+    next_song = queue.peek() if queue else None
+    if not next_song:
+        return
+    image_urls = []
+    if next_song.get("image_url"):
+        first_frame = blur_image(next_song["image_url"], MAX_BLUR, next_song.get("image_variants"))
+        if first_frame and not first_frame.startswith("data:"):
+            image_urls.append(first_frame)
+    audio_urls = [next_song["preview_url"]] if next_song.get("preview_url") else []
+    if image_urls or audio_urls:
+        st.markdown(preload_hints(image_urls, audio_urls), unsafe_allow_html=True)
+
+
 def calculate_score(guess: int, actual: int, time_taken: int, hints_used: int = 0) -> int:
     """Calculate score based on accuracy and time"""
     year_diff = abs(guess - actual)
@@ -818,7 +1595,6 @@ def initialize_game_state():
         "current_round": 0,
         "played_song_ids": set(),
         "played_song_keys": set(),
-        "next_song_cache": None,
         "audio_started": False,
         "song_loaded_time": None,
         "timed_out": False,
@@ -837,16 +1613,165 @@ def initialize_game_state():
             st.session_state[key] = value
 
 
-def prefetch_next_song(start_year: int, end_year: int, genre_query: str = ""):
-    """Prefetch the next song in background"""
-    played_ids = st.session_state.get("played_song_ids", set())
-    played_keys = st.session_state.get("played_song_keys", set())
-    next_song = get_random_song(start_year, end_year, played_ids, played_keys, genre_query)
-    if next_song:
-        if next_song.get("image_url"):
-            blur_image(next_song["image_url"], 25)
-            blur_image(next_song["image_url"], 0)
-        st.session_state.next_song_cache = next_song
+def reset_song_selection():
+    """Forget this session's played songs.
+
+    Scoped to the current session: shared track, playlist and preview caches
+    stay warm for every other player. Prepared songs stay queued, since they
+    are still valid for the same genre and years.
+    """
+    st.session_state.played_song_ids = set()
+    st.session_state.played_song_keys = set()
+
+
+@st.cache_resource
+def get_song_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool that prepares upcoming songs"""
+    return ThreadPoolExecutor(
+        max_workers=get_setting("songs", "prefetch_workers", 4), thread_name_prefix="song-prefetch"
+    )
+
+
+SONG_QUEUE_DEPTH = get_setting("songs", "queue_depth", 2)
+# Welcome screen settings must be left alone this long before songs are prepared
+PREFETCH_SETTLE_SECONDS = get_setting("songs", "prefetch_settle_seconds", 1.0)
+# Latency budget for picking a round's song when the player is waiting on it
+SONG_SELECTION_BUDGET_SECONDS = get_setting("songs", "selection_budget_seconds", 2.0)
+
+
+def _song_keys(song: dict) -> tuple:
+    """Identifiers that mark a song as played"""
+    return (song["id"], song.get("song_key"))
+
+
+def _played_songs() -> set:
+    """This session's played song ids and keys, for excluding songs from selection"""
+    return st.session_state.get("played_song_ids", set()) | st.session_state.get(
+        "played_song_keys", set()
+    )
+
+
+def prepare_song(start_year: int, end_year: int, genre_query: str, exclude: set) -> dict | None:
+    """Pick a playable song and render its whole blur ladder (runs on prefetch workers)"""
+    song = get_random_song(start_year, end_year, exclude, exclude, genre_query)
+    if song and song.get("image_url"):
+        ladder = warm_blur_ladder(
+            song["image_url"], song.get("image_variants"), block_first_frame=False
+        )
+        wait(ladder)
+    return song
+
+
+@st.cache_resource
+def get_song_pool() -> SharedPool | None:
+    """Prepared songs for the genre presets, shared by every session"""
+    target = get_setting("songs", "pool_target", 6)
+    if target <= 0:
+        return None
+    return SharedPool(
+        get_song_executor(),
+        target=target,
+        max_items=target * 4,
+        # Deezer preview URLs are signed and expire
+        max_age=get_setting("songs", "pool_max_age", 600),
+        keys_of=_song_keys,
+    )
+
+
+_song_pool = get_song_pool()
+
+
+def _pool_params(start_year: int, end_year: int, genre_query: str) -> tuple | None:
+    """Pool key when the settings match a genre's preset years, else None.
+
+    Only the presets are pooled; custom year ranges are too varied to share.
+    """
+    for config in GENRE_CONFIG.values():
+        if config["query"] == genre_query and config["best_years"] == (start_year, end_year):
+            return (SONG_CATALOG, genre_query, start_year, end_year)
+    return None
+
+
+def draw_shared_song(start_year: int, end_year: int, genre_query: str, exclude: set) -> dict | None:
+    """Take a prepared song from the shared pool, if these settings are pooled"""
+    params = _pool_params(start_year, end_year, genre_query)
+    if _song_pool is None or params is None:
+        return None
+    return _song_pool.draw(
+        params, exclude, functools.partial(prepare_song, start_year, end_year, genre_query)
+    )
+
+
+def prepare_session_song(
+    start_year: int, end_year: int, genre_query: str, exclude: set
+) -> dict | None:
+    """Producer for a session's queue: the shared pool first, else prepare a song"""
+    song = draw_shared_song(start_year, end_year, genre_query, exclude)
+    if song is None:
+        song = prepare_song(start_year, end_year, genre_query, exclude)
+        params = _pool_params(start_year, end_year, genre_query)
+        if song and _song_pool is not None and params is not None:
+            _song_pool.add(params, song)
+    return song
+
+
+def get_song_queue(start_year: int, end_year: int, genre_query: str = "") -> ReadyQueue:
+    """This session's queue of prepared songs, pointed at the given settings.
+
+    Changing the genre or year range cancels songs prepared for the old ones.
+    """
+    if "song_queue" not in st.session_state:
+        st.session_state.song_queue = ReadyQueue(
+            get_song_executor(), SONG_QUEUE_DEPTH, keys_of=_song_keys
+        )
+    queue = st.session_state.song_queue
+    queue.configure(
+        (start_year, end_year, genre_query),
+        functools.partial(prepare_session_song, start_year, end_year, genre_query),
+    )
+    return queue
+
+
+def cancel_prefetch():
+    """Drop songs prepared for settings the player has just changed"""
+    queue = st.session_state.get("song_queue")
+    if queue:
+        queue.cancel()
+
+
+def prefetch_songs(start_year: int, end_year: int, genre_query: str = "", delay: float = 0.0):
+    """Top up this session's prepared songs in the background"""
+    get_song_queue(start_year, end_year, genre_query).fill(_played_songs(), delay=delay)
+
+
+def select_song(start_year: int, end_year: int, genre_query: str = "") -> dict | None:
+    """Pick the next round's song within `SONG_SELECTION_BUDGET_SECONDS`.
+
+    Prepared songs come first: this session's queue (waiting briefly for one
+    already in flight), then the shared pool. Only then is a song searched for
+    with the remaining budget, and the prepared songs are checked once more in
+    case one landed in the meantime. The budget bounds the fast path only:
+    when all of that comes up empty, the queue's in-flight work is awaited and
+    then a search runs without a deadline, so a slow round still gets a song.
+    """
+    deadline = time.monotonic() + SONG_SELECTION_BUDGET_SECONDS
+    played = _played_songs()
+    queue = get_song_queue(start_year, end_year, genre_query)
+
+    song = queue.take(played, timeout=SONG_SELECTION_BUDGET_SECONDS / 2)
+    if song is None:
+        song = draw_shared_song(start_year, end_year, genre_query, played)
+    if song is None:
+        st.session_state.status_message = "🔍 Searching for a song..."
+        remaining = max(0.0, deadline - time.monotonic())
+        song = get_random_song(start_year, end_year, played, played, genre_query, remaining)
+    if song is None:
+        song = queue.take(played) or draw_shared_song(start_year, end_year, genre_query, played)
+    if song is None:
+        song = queue.take(played, timeout=None)
+    if song is None:
+        song = get_random_song(start_year, end_year, played, played, genre_query)
+    return song
 
 
 def start_new_game(start_year: int, end_year: int, genre_query: str = ""):
@@ -862,18 +1787,7 @@ def start_new_game(start_year: int, end_year: int, genre_query: str = ""):
     except Exception:
         pass
 
-    song = st.session_state.get("next_song_cache")
-
-    played_ids = st.session_state.get("played_song_ids", set())
-    played_keys = st.session_state.get("played_song_keys", set())
-    if song and (song["id"] in played_ids or song.get("song_key") in played_keys):
-        song = None
-
-    if song is None:
-        st.session_state.status_message = "🔍 Searching for a song..."
-        song = get_random_song(start_year, end_year, played_ids, played_keys, genre_query)
-
-    st.session_state.next_song_cache = None
+    song = select_song(start_year, end_year, genre_query)
 
     if song is None:
         played_count = len(st.session_state.get("played_song_ids", set()))
@@ -889,11 +1803,10 @@ def start_new_game(start_year: int, end_year: int, genre_query: str = ""):
         st.session_state.played_song_keys.add(song["song_key"])
 
     if song.get("image_url"):
-        # Pre-cache both blurred and unblurred versions
-        # Start with blurred to ensure it's ready first
-        blur_image(song["image_url"], 25)
-        # Cache unblurred for later (when game ends)
-        blur_image(song["image_url"], 0)
+        # Render the fully blurred first frame now and the rest of the ladder
+        # (down to the unblurred reveal) on the worker pool; a prepared song
+        # already has every frame cached
+        warm_blur_ladder(song["image_url"], song.get("image_variants"))
 
     st.session_state.current_round += 1
     st.session_state.current_song = song
@@ -912,7 +1825,7 @@ def start_new_game(start_year: int, end_year: int, genre_query: str = ""):
     st.session_state.guess_timed_out = False
     st.session_state.loading_next_song = False
 
-    prefetch_next_song(start_year, end_year, genre_query)
+    prefetch_songs(start_year, end_year, genre_query)
 
 
 def make_guess(guess_year: int, timed_out: bool = False):
@@ -1066,11 +1979,18 @@ def render_game_interface():
         with main_left:
             # Album artwork (much larger - 450px)
             if song["image_url"]:
-                # Apply calculated blur (starts at 25, decreases over time)
-                applied_blur = max(0, int(current_blur))
-                blurred_image = blur_image(song["image_url"], applied_blur)
-                if blurred_image:
-                    st.markdown(album_image(blurred_image, 450), unsafe_allow_html=True)
+                if BLUR_KEYFRAMES:
+                    render_album_crossfade(song, max(0.0, current_blur))
+                else:
+                    # Apply calculated blur (starts at 25, decreases over time)
+                    applied_blur = max(0, int(current_blur))
+                    blurred_image = blur_image(
+                        song["image_url"], applied_blur, song.get("image_variants")
+                    )
+                    if blurred_image:
+                        st.markdown(
+                            album_image(blurred_image, ALBUM_DISPLAY_SIZE), unsafe_allow_html=True
+                        )
 
             # Audio visualizer bars - stop when time is up
             is_playing = st.session_state.audio_started and not st.session_state.time_locked
@@ -1392,9 +2312,12 @@ def render_game_interface():
         result_col1, result_spacer, result_col2 = st.columns([1.2, 0.1, 0.8])
         with result_col1:
             if song["image_url"]:
-                blurred_image = blur_image(song["image_url"], 0)  # Fully revealed
+                # Fully revealed - the only frame that needs the full-size cover
+                blurred_image = blur_image(song["image_url"], 0)
                 if blurred_image:
-                    st.markdown(album_image(blurred_image, 450), unsafe_allow_html=True)
+                    st.markdown(
+                        album_image(blurred_image, ALBUM_DISPLAY_SIZE), unsafe_allow_html=True
+                    )
 
             # Audio visualizer under album in results (keep synth visible)
             # Start as static (not moving) unless the audio is actually playing.
@@ -1414,8 +2337,9 @@ def render_game_interface():
             st.markdown(correct_answer_with_diff(song["year"], guess_val), unsafe_allow_html=True)
             st.markdown(score_card(last_score["score"]), unsafe_allow_html=True)
 
-            # Listen on Deezer button
-            st.markdown(spotify_button(song["deezer_url"]), unsafe_allow_html=True)
+            # Listen on Spotify or Deezer, whichever catalog the song came from
+            listen_button = deezer_button if song.get("catalog") == "deezer" else spotify_button
+            st.markdown(listen_button(song["deezer_url"]), unsafe_allow_html=True)
 
             st.write("")
 
@@ -1451,6 +2375,9 @@ def render_game_interface():
                     st.session_state.saving_to_leaderboard = True
                     st.rerun()
 
+        if not st.session_state.get("loading_next_song", False):
+            render_next_song_preloads()
+
 
 def render_leaderboard():
     """Display the persistent leaderboard (round-based)"""
@@ -1493,6 +2420,34 @@ def render_song_history():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+def collect_stats() -> dict:
+    """Counters from the process-wide caches, pools and breakers plus this session's queue"""
+    stats = {
+        "memory": _memory_budget.stats(),
+        "latency": _latency.stats(),
+        "breakers": _breakers.stats(),
+    }
+    optional = {
+        "response_cache": _response_cache,
+        "frame_cache": _frame_cache,
+        "image_pool": _image_pool,
+        "song_pool": _song_pool,
+        "song_queue": st.session_state.get("song_queue"),
+    }
+    for name, source in optional.items():
+        if source is not None:
+            stats[name] = source.stats()
+    return stats
+
+
+def render_runtime_stats():
+    """Opt-in view of `collect_stats` for tuning the cache and upstream settings"""
+    if not get_setting("debug", "stats", False):
+        return
+    with st.expander("Runtime stats"):
+        st.json(collect_stats(), expanded=1)
+
+
 def render_settings_panel():
     """Render a compact settings panel with genre, year range, and player name"""
     st.markdown(
@@ -1525,11 +2480,10 @@ def render_settings_panel():
             best_years = GENRE_CONFIG[selected_genre]["best_years"]
             st.session_state.start_year = best_years[0]
             st.session_state.end_year = best_years[1]
-            # Clear song cache when genre changes
-            clear_song_cache()
-            st.session_state.played_song_ids = set()
-            st.session_state.played_song_keys = set()
-            st.session_state.next_song_cache = None
+            # Only this session's picks are reset; the shared caches are keyed by
+            # genre and year, so other players keep their warm track lists
+            reset_song_selection()
+            cancel_prefetch()
             st.rerun()
 
     with col_name:
@@ -1552,6 +2506,8 @@ def render_settings_panel():
         value=(st.session_state.start_year, st.session_state.end_year),
         label_visibility="collapsed",
     )
+    if year_range != (st.session_state.start_year, st.session_state.end_year):
+        cancel_prefetch()
     st.session_state.start_year = year_range[0]
     st.session_state.end_year = year_range[1]
 
@@ -1566,6 +2522,36 @@ def render_settings_panel():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+def get_session_id() -> str:
+    """Get the Streamlit session id for the current script run"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "bare"
+
+
+def get_game_phase() -> str:
+    """Name the game phase the current rerun is rendering"""
+    if st.session_state.get("saving_to_leaderboard"):
+        return "saving_to_leaderboard"
+    if st.session_state.get("loading_game"):
+        return "loading_game"
+    if st.session_state.get("game_active"):
+        return "game_over" if st.session_state.get("game_over") else "guessing"
+    return "welcome"
+
+
+def profile_rerun():
+    """Wrap a script run in the opt-in rerun profiler (no-op unless enabled)"""
+    if not get_setting("profile", "enabled", False):
+        return contextlib.nullcontext()
+    profiler = RerunProfiler(
+        get_setting("profile", "dir", ".profiles"),
+        interval=get_setting("profile", "interval_ms", 5) / 1000,
+        max_files=get_setting("profile", "max_files", 500),
+    )
+    # Resolved after the run: a click on Start renders loading_game, not welcome
+    return profiler.profile(get_session_id(), get_game_phase)
+
+
 def main():
     """Main application"""
     initialize_game_state()
@@ -1671,9 +2657,7 @@ def main():
         st.session_state.game_over = False
         st.session_state.current_round = 0
         st.session_state.player_scores = []
-        st.session_state.played_song_ids = set()
-        st.session_state.played_song_keys = set()
-        st.session_state.next_song_cache = None
+        reset_song_selection()
         st.session_state.saving_to_leaderboard = False
         st.rerun()
 
@@ -1684,6 +2668,15 @@ def main():
         # Settings panel
         render_settings_panel()
 
+        # Start preparing the first song while the player looks at the settings;
+        # changing them redirects the work to the new genre and years
+        prefetch_songs(
+            st.session_state.start_year,
+            st.session_state.end_year,
+            GENRE_CONFIG[st.session_state.selected_genre]["query"],
+            delay=PREFETCH_SETTLE_SECONDS,
+        )
+
         # Add extra vertical space below settings
         st.markdown("<div style='height:2.5em;'></div>", unsafe_allow_html=True)
 
@@ -1700,9 +2693,7 @@ def main():
                 "🎵 Start New Game", type="primary", use_container_width=True, key="start_game"
             ):
                 st.session_state.current_round = 0
-                st.session_state.played_song_ids = set()
-                st.session_state.played_song_keys = set()
-                st.session_state.next_song_cache = None
+                reset_song_selection()
                 st.session_state.loading_game = True
                 # Immediately rerun so the loading spinner block runs on first click
                 st.rerun()
@@ -1719,6 +2710,9 @@ def main():
         # Song history at bottom
         render_song_history()
 
+    render_runtime_stats()
+
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun():
+        main()
@@ -0,0 +1,253 @@
+"""
+Background song preparation for Song Year Guesser
+
+Choosing a song means searching Spotify, resolving a Deezer preview for up to
+20 candidates and rendering the album's blur ladder. `ReadyQueue` does that
+work ahead of time on a thread pool so a round can start from a song that is
+already prepared. `SharedPool` holds prepared songs for popular settings that
+every session draws from, so that work is shared between players.
+
+Worker threads have no Streamlit script context, so producers must not touch
+`st.session_state`; everything they need is passed in when work is queued.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import Executor, Future
+from typing import Any
+
+
+class ReadyQueue:
+    """Per-session queue kept topped up with prepared items by background workers.
+
+    The queue serves one set of `params` at a time (for songs: the year range
+    and genre). `configure` with different params cancels the old work: queued
+    items are dropped, pending jobs are cancelled, and jobs already running are
+    discarded when they finish. `produce(exclude)` must return an item whose
+    keys (from `keys_of`) are not in `exclude`, or None when nothing is left.
+    """
+
+    def __init__(self, executor: Executor, depth: int, keys_of: Callable[[Any], Iterable]):
+        self.executor = executor
+        self.depth = depth
+        self.keys_of = keys_of
+        self.params: Hashable | None = None
+        self._produce: Callable[[set], Any] | None = None
+        self._items: list = []
+        self._futures: set[Future] = set()
+        self._exclude: set = set()
+        self._generation = 0
+        self._timer: threading.Timer | None = None
+        # Reentrant: a job that finishes before `add_done_callback` returns runs
+        # its callback on the submitting thread, which already holds the lock
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+
+    def configure(self, params: Hashable, produce: Callable[[set], Any]) -> bool:
+        """Point the queue at `params`; returns True when that cancelled old work"""
+        with self._lock:
+            self._produce = produce
+            if params == self.params:
+                return False
+            changed = self.params is not None
+            self.params = params
+            self._cancel_locked()
+            return changed
+
+    def cancel(self):
+        """Drop queued items and stop pending work"""
+        with self._lock:
+            self.params = None
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        self._generation += 1
+        self._items.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        futures, self._futures = self._futures, set()
+        for future in futures:
+            future.cancel()
+        self._changed.notify_all()
+
+    def peek(self) -> Any | None:
+        """The item `take` would return next, without removing it"""
+        with self._lock:
+            return self._items[0] if self._items else None
+
+    def take(self, exclude: set, timeout: float | None = 0.0) -> Any | None:
+        """Remove and return the first ready item with no key in `exclude`.
+
+        With a `timeout`, waits that long for work already in flight when
+        nothing is ready yet; with None, waits until that work has finished.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            self._exclude = set(exclude)
+            while True:
+                self._items = [item for item in self._items if self._allowed(item)]
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if self._items or not self._futures or (remaining is not None and remaining <= 0):
+                    break
+                self._changed.wait(remaining)
+            return self._items.pop(0) if self._items else None
+
+    def fill(self, exclude: set, delay: float = 0.0):
+        """Queue background work until ready plus in-flight items reach `depth`.
+
+        With a `delay`, work starts only once `fill` has not been called again
+        for that long, so settings that are still changing are not prepared.
+        """
+        with self._lock:
+            self._exclude = set(exclude)
+            self._items = [item for item in self._items if self._allowed(item)]
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if delay <= 0:
+                self._submit_locked()
+                return
+            self._timer = threading.Timer(delay, self._delayed_fill, args=(self._generation,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _delayed_fill(self, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._timer = None
+                self._submit_locked()
+
+    def _allowed(self, item) -> bool:
+        return not any(key in self._exclude for key in self.keys_of(item))
+
+    def _submit_locked(self):
+        if self._produce is None:
+            return
+        while len(self._items) + len(self._futures) < self.depth:
+            exclude = self._exclude | {k for item in self._items for k in self.keys_of(item)}
+            future = self.executor.submit(self._produce, exclude)
+            self._futures.add(future)
+            future.add_done_callback(
+                lambda f, generation=self._generation: self._finished(f, generation)
+            )
+
+    def _finished(self, future: Future, generation: int):
+        """Store a produced item if the queue has not been reconfigured since"""
+        with self._lock:
+            self._futures.discard(future)
+            self._changed.notify_all()
+            if generation != self._generation or future.cancelled():
+                return
+            try:
+                item = future.result()
+            except Exception as e:
+                print(f"WARNING: Background song preparation failed: {e}")
+                return
+            if item is None:
+                # Nothing left to prepare; the next `fill` tries again
+                return
+            taken = self._exclude | {k for i in self._items for k in self.keys_of(i)}
+            if any(key in taken for key in self.keys_of(item)):
+                # A concurrent job prepared the same song; prepare another
+                self._submit_locked()
+                return
+            self._items.append(item)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ready": len(self._items), "in_flight": len(self._futures)}
+
+
+class SharedPool:
+    """Process-wide pools of prepared items, one per set of `params`, shared by sessions.
+
+    Drawing does not remove an item: another session that has not played it
+    may still get it. After each draw the pool is refilled in the background
+    until the requester has `target` unplayed items available. Pools keep at
+    most `max_items` (oldest dropped first), and items older than `max_age`
+    seconds are discarded because prepared data such as preview URLs expires.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        target: int,
+        max_items: int,
+        max_age: float,
+        keys_of: Callable[[Any], Iterable],
+    ):
+        self.executor = executor
+        self.target = target
+        self.max_items = max_items
+        self.max_age = max_age
+        self.keys_of = keys_of
+        self.hits = 0
+        self.misses = 0
+        self._pools: dict[Hashable, list[tuple[float, Any]]] = {}
+        self._in_flight: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def draw(self, params: Hashable, exclude: set, produce: Callable[[set], Any]) -> Any | None:
+        """Return a random fresh item with no key in `exclude`, refilling in the background"""
+        with self._lock:
+            pool = self._fresh_locked(params)
+            available = [
+                item for _, item in pool if not any(k in exclude for k in self.keys_of(item))
+            ]
+            item = random.choice(available) if available else None
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                available.remove(item)
+            wanted = max(0, self.target - len(available) - self._in_flight.get(params, 0))
+            self._in_flight[params] = self._in_flight.get(params, 0) + wanted
+            refill_exclude = exclude | {k for _, i in pool for k in self.keys_of(i)}
+        # Submitted outside the lock: a job that finishes immediately runs its
+        # callback on this thread
+        for _ in range(wanted):
+            future = self.executor.submit(produce, refill_exclude)
+            future.add_done_callback(lambda f, params=params: self._finished(f, params))
+        return item
+
+    def add(self, params: Hashable, item: Any):
+        """Offer an item prepared elsewhere to the pool for `params`"""
+        with self._lock:
+            self._add_locked(params, item)
+
+    def _fresh_locked(self, params: Hashable) -> list[tuple[float, Any]]:
+        cutoff = time.monotonic() - self.max_age
+        pool = [entry for entry in self._pools.get(params, []) if entry[0] >= cutoff]
+        self._pools[params] = pool
+        return pool
+
+    def _add_locked(self, params: Hashable, item: Any):
+        pool = self._fresh_locked(params)
+        keys = set(self.keys_of(item))
+        if any(keys & set(self.keys_of(i)) for _, i in pool):
+            return
+        pool.append((time.monotonic(), item))
+        del pool[: max(0, len(pool) - self.max_items)]
+
+    def _finished(self, future: Future, params: Hashable):
+        try:
+            item = future.result()
+        except Exception as e:
+            print(f"WARNING: Shared song pool refill failed: {e}")
+            item = None
+        with self._lock:
+            self._in_flight[params] -= 1
+            if item is not None:
+                self._add_locked(params, item)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "pools": {str(p): len(items) for p, items in self._pools.items()},
+                "in_flight": sum(self._in_flight.values()),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,189 @@
+"""
+Per-rerun profiling for Song Year Guesser
+
+Streamlit re-executes the whole script on every interaction and on every
+`st_autorefresh` tick, so reruns dominate CPU time during play. This module
+provides an opt-in sampling profiler that records one profile per script run,
+tagged with the session and the game phase being rendered, and a small command
+that merges those profiles into the folded-stack format used by flame graph
+tools (flamegraph.pl, speedscope, inferno).
+
+Enable it with the `SYG_PROFILE_ENABLED=1` environment variable or with
+`enabled = true` under `[profile]` in Streamlit secrets, then aggregate:
+
+    python profiling.py merge .profiles > reruns.folded
+    python profiling.py merge .profiles --phase guessing > guessing.folded
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_SUFFIX = ".folded"
+DEFAULT_INTERVAL_SECONDS = 0.005
+DEFAULT_MAX_FILES = 500
+
+
+def _frame_label(frame) -> str:
+    """Format a frame as `function (file:line)` for a folded stack"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _walk_stack(frame) -> str:
+    """Build a root-first, semicolon separated stack from a leaf frame"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class RerunProfiler:
+    """Sampling profiler that writes one folded-stack file per script run.
+
+    A background thread samples the script thread's Python stack every
+    `interval` seconds. Files are named `<millis>_<session>_<phase>.folded`
+    and the directory is rotated so it never holds more than `max_files`.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        max_files: int = DEFAULT_MAX_FILES,
+    ):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.max_files = max_files
+
+    @contextmanager
+    def profile(self, session_id: str, phase: str | Callable[[], str]) -> Iterator[None]:
+        """Sample the calling thread for the duration of the block.
+
+        `phase` may be a callable, evaluated when the block exits, so the
+        profile is filed under the phase the run ended up rendering.
+        """
+        target_ident = threading.get_ident()
+        samples: Counter[str] = Counter()
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.interval):
+                frame = sys._current_frames().get(target_ident)
+                if frame is not None:
+                    samples[_walk_stack(frame)] += 1
+
+        sampler = threading.Thread(target=sample, name="rerun-profiler", daemon=True)
+        started = time.time()
+        sampler.start()
+        try:
+            yield
+        finally:
+            # Runs for st.rerun()/st.stop() too, which raise BaseException subclasses
+            stop.set()
+            sampler.join()
+            try:
+                if callable(phase):
+                    phase = phase()
+                self._write(samples, started, session_id, phase)
+            except OSError as e:
+                print(f"WARNING: Could not write rerun profile: {e}")
+
+    def _write(self, samples: Counter[str], started: float, session_id: str, phase: str):
+        """Write the folded stacks for one rerun and rotate old profiles"""
+        if not samples:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        safe_session = "".join(c for c in session_id if c.isalnum())[:12] or "unknown"
+        path = self.output_dir / f"{int(started * 1000)}_{safe_session}_{phase}{PROFILE_SUFFIX}"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.items()))
+        self._rotate()
+
+    def _rotate(self):
+        """Delete the oldest profiles beyond `max_files`"""
+        profiles = sorted(self.output_dir.glob(f"*{PROFILE_SUFFIX}"))
+        for old in profiles[: max(0, len(profiles) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+
+def parse_profile_name(path: Path) -> tuple[int, str, str]:
+    """Split a profile filename into (timestamp_ms, session, phase)"""
+    timestamp, session, phase = path.stem.split("_", 2)
+    return int(timestamp), session, phase
+
+
+def merge_profiles(
+    profile_dir: str | Path,
+    phase: str | None = None,
+    session: str | None = None,
+    group_by_phase: bool = True,
+) -> Counter[str]:
+    """Merge per-rerun profiles into a single folded-stack counter.
+
+    Args:
+        profile_dir: Directory written by `RerunProfiler`
+        phase: Only include reruns rendered in this game phase
+        session: Only include reruns from this session id prefix
+        group_by_phase: Prefix every stack with its phase so the flame graph
+            splits by game phase at the root
+    """
+    merged: Counter[str] = Counter()
+    for path in sorted(Path(profile_dir).glob(f"*{PROFILE_SUFFIX}")):
+        try:
+            _, file_session, file_phase = parse_profile_name(path)
+        except ValueError:
+            continue
+        if phase and file_phase != phase:
+            continue
+        if session and not file_session.startswith(session):
+            continue
+        for line in path.read_text().splitlines():
+            stack, _, count = line.rpartition(" ")
+            if not stack or not count.isdigit():
+                continue
+            if group_by_phase:
+                stack = f"phase:{file_phase};{stack}"
+            merged[stack] += int(count)
+    return merged
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point for aggregating rerun profiles"""
+    parser = argparse.ArgumentParser(description="Aggregate Song Year Guesser rerun profiles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge_parser = subparsers.add_parser(
+        "merge", help="Merge per-rerun profiles into one flame-graph-ready folded file"
+    )
+    merge_parser.add_argument("profile_dir", nargs="?", default=".profiles")
+    merge_parser.add_argument("--phase", help="Only include reruns from this game phase")
+    merge_parser.add_argument("--session", help="Only include reruns from this session")
+    merge_parser.add_argument(
+        "--no-phase-root", action="store_true", help="Do not group stacks under their phase"
+    )
+    merge_parser.add_argument("-o", "--output", help="Write to a file instead of stdout")
+    args = parser.parse_args(argv)
+
+    merged = merge_profiles(
+        args.profile_dir,
+        phase=args.phase,
+        session=args.session,
+        group_by_phase=not args.no_phase_root,
+    )
+    lines = "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+    if args.output:
+        Path(args.output).write_text(lines)
+    else:
+        sys.stdout.write(lines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1302,6 +1302,37 @@ def album_image(image_url: str, width: int = 280) -> str:
     """
 
 
+def album_crossfade(layers: list[tuple[str, float]], width: int = 280, fade_ms: int = 1000) -> str:
+    """Generate stacked album images whose opacities crossfade between blur keyframes"""
+    layer_style = (
+        "position: absolute; top: 0; left: 0; width: 100%; height: 100%; "
+        f"transition: opacity {fade_ms}ms linear;"
+    )
+    images_html = "".join(
+        f'<img src="{src}" class="album-art" style="{layer_style} opacity: {opacity:.3f};'
+        + (" box-shadow: none;" if i else "")
+        + '">'
+        for i, (src, opacity) in enumerate(layers)
+    )
+    return f"""
+    <div class="album-container">
+        <div style="position: relative; width: {width}px; max-width: 100%; aspect-ratio: 1;">
+            {images_html}
+        </div>
+    </div>
+    """
+
+
+def preload_hints(image_urls: list[str], audio_urls: list[str]) -> str:
+    """Generate hidden elements that make the browser fetch upcoming media early"""
+    links = "".join(f'<link rel="preload" as="image" href="{url}">' for url in image_urls)
+    audio = "".join(
+        f'<audio src="{url}" preload="auto" muted style="display: none;"></audio>'
+        for url in audio_urls
+    )
+    return f'<div style="display: none;">{links}{audio}</div>'
+
+
 def audio_visualizer(is_playing: bool = True) -> str:
     """Generate animated audio visualizer bars"""
     static_class = "" if is_playing else "audio-viz-static"
@@ -2281,6 +2312,17 @@ def spotify_button(url: str) -> str:
     """
 
 
+def deezer_button(url: str) -> str:
+    """Generate a Deezer listen button"""
+    return f"""
+    <div class="listen-btn-container">
+        <a href="{url}" target="_blank" class="listen-btn">
+            🎧 Listen on Deezer
+        </a>
+    </div>
+    """
+
+
 def how_to_play() -> str:
     """Generate the how to play section"""
     return """
@@ -0,0 +1,370 @@
+"""
+Upstream request policies for Song Year Guesser
+
+Song selection fans out to Spotify and Deezer, and a slow response from either
+holds up a round. `AsyncUpstream` runs that I/O on one background event loop
+with a pooled HTTP client, with blocking wrappers for Streamlit script
+threads. `LatencyTracker` keeps a rolling window of response times per
+endpoint, and `hedged` uses it to send a duplicate request when the first one
+is slower than the observed p95, returning whichever answers first, and
+`timeout` derives request timeouts from the observed p99.
+
+`CircuitBreaker` stops calling a host that keeps failing. While a breaker is
+open, calls fail immediately with `CircuitOpenError` so callers fall back to
+cached data instead of every session waiting out its timeout; after a cool-off
+a single probe request decides whether the host has recovered.
+
+`ResponseCache` keeps response bodies on disk with their validators (ETag,
+Last-Modified) so a refetch after the in-memory caches expire can be a
+conditional request answered with 304 Not Modified instead of a full download.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from caching import DiskStore
+
+DEFAULT_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling window of recent response times per endpoint"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, endpoint: str, q: float, default: float) -> float:
+        """The `q` quantile (0-1) of recent samples, or `default` until enough are seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < MIN_SAMPLES:
+            return default
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout(
+        self, endpoint: str, default: float, factor: float = 3.0, minimum: float = 0.5
+    ) -> float:
+        """Request timeout of `factor` times the recent p99, within [`minimum`, `default`].
+
+        `default` is used until enough responses have been timed, and is also
+        the ceiling, so adapting can only shorten a timeout.
+        """
+        p99 = self.percentile(endpoint, 0.99, default / factor)
+        return min(default, max(minimum, p99 * factor))
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = list(self._samples)
+        return {
+            endpoint: {
+                "p50": self.percentile(endpoint, 0.5, 0.0),
+                "p95": self.percentile(endpoint, 0.95, 0.0),
+                "p99": self.percentile(endpoint, 0.99, 0.0),
+            }
+            for endpoint in endpoints
+        }
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[Any]],
+    hedge_after: float,
+    accept: Callable[[Any], bool] = lambda result: result is not None,
+) -> Any:
+    """Await `fn()`, starting one duplicate if the first takes over `hedge_after` seconds.
+
+    Returns the first result that `accept` approves, or the last result when
+    neither is accepted. A call that raises is ignored while the other is
+    still running; the error is raised only when no call returned a result.
+    Whichever call is still running is cancelled.
+    """
+    pending = {asyncio.ensure_future(fn())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if not done:
+            pending.add(asyncio.ensure_future(fn()))
+        results = []
+        error: BaseException | None = None
+        while True:
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                results.append(task.result())
+                if accept(results[-1]):
+                    return results[-1]
+            if not pending:
+                if results:
+                    return results[-1]
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class AsyncUpstream:
+    """Event loop on a background thread that runs upstream HTTP for every session.
+
+    Requests share one pooled `httpx.AsyncClient`, so a fan-out of dozens of
+    lookups needs no thread per request. Script and worker threads hand
+    coroutines over with `submit` (returns a `concurrent.futures.Future`) or
+    block on them with `run`; code already on the loop awaits them directly.
+    """
+
+    def __init__(self, max_connections: int = 64, name: str = "upstream-io"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self.client: httpx.AsyncClient = self.run(self._create_client(max_connections))
+
+    @staticmethod
+    async def _create_client(max_connections: int) -> httpx.AsyncClient:
+        # Created on the loop so its connection pool belongs to it
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections), follow_redirects=True
+        )
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop from any other thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """Run a coroutine on the loop and wait for its result (not from the loop itself)"""
+        if threading.get_ident() == self._thread.ident:
+            coro.close()
+            raise RuntimeError("AsyncUpstream.run() called from its own event loop")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def coalesce(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await one shared `factory()` call for every concurrent caller with `key`"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the others' request
+        return await asyncio.shield(task)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class UpstreamError(Exception):
+    """An upstream answered with an error (HTTP status or error payload) instead of data"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one upstream host.
+
+    Outcomes from the last `window` seconds are kept. Once at least
+    `min_calls` were seen and `failure_rate` of them failed, the breaker opens
+    for `open_seconds`. It then goes half-open and lets one probe through at a
+    time: a success closes it, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 30.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_seconds: float = 15.0,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Raise `CircuitOpenError` unless a call may go ahead now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe in flight")
+                self._probing = True
+
+    def record(self, success: bool):
+        """Report the outcome of a call allowed by `acquire`"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                self._outcomes.clear()
+                if success:
+                    self._transition(self.CLOSED)
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((now, success))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            calls = len(self._outcomes)
+            if (
+                self.state == self.CLOSED
+                and calls >= self.min_calls
+                and failures / calls >= self.failure_rate
+            ):
+                self._open(now)
+
+    def release(self):
+        """Give back a call allowed by `acquire` that was abandoned before finishing"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self.times_opened += 1
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            print(f"WARNING: Circuit breaker for {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class CircuitBreakers:
+    """One `CircuitBreaker` per upstream host, created on first use"""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, **self.breaker_options)
+            return breaker
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+class ResponseCache(DiskStore):
+    """Disk cache of HTTP responses that are revalidated rather than refetched.
+
+    Only responses carrying an ETag or Last-Modified header are stored, keyed
+    by a hash of the request URL and market. `validators` turns a stored entry
+    into conditional request headers; when the server answers 304 the stored
+    body is reused.
+    """
+
+    VALIDATORS = {"etag": "If-None-Match", "last-modified": "If-Modified-Since"}
+    STORED_HEADERS = ("content-type", *VALIDATORS)
+
+    def __init__(self, directory: str | Path, max_bytes: int, prune_every: int = 50):
+        super().__init__(directory, max_bytes, prune_every)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def key(url: str, market: str = "") -> str:
+        return hashlib.sha256(f"{market}\0{url}".encode()).hexdigest()
+
+    def get(self, url: str, market: str = "") -> tuple[dict, bytes] | None:
+        """Return the stored `(headers, body)` for a request, or None"""
+        data = self.read(self.key(url, market))
+        if data is None:
+            return None
+        try:
+            meta, body = data.split(b"\n", 1)
+            return json.loads(meta)["headers"], body
+        except (ValueError, KeyError):
+            return None
+
+    @classmethod
+    def validators(cls, headers: dict) -> dict:
+        """Conditional request headers for a stored response"""
+        return {cls.VALIDATORS[name]: headers[name] for name in cls.VALIDATORS if name in headers}
+
+    def put(self, url: str, market: str, headers: dict, body: bytes):
+        """Store a full response if it has validators to revalidate it with later"""
+        headers = {name: headers[name] for name in self.STORED_HEADERS if name in headers}
+        if not self.validators(headers):
+            return
+        meta = json.dumps({"url": url, "market": market, "headers": headers}).encode()
+        self.write(self.key(url, market), meta + b"\n" + body)
+
+    def record(self, hit: bool, size: int = 0):
+        """Count a revalidated (`hit`, `size` bytes not downloaded) or full response"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += size
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }